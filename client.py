@@ -18,42 +18,63 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import collections
+import functools
+import http.client
 import io
 import json
 import os
-import queue
-import select
 import shutil
+import socket
 import subprocess
 import sys
 import tempfile
-import threading
 import termios
 import tty
-import urllib.error
-import urllib.request
-from typing import Dict, List, Optional
+import urllib.parse
+from typing import Dict, Iterable, List, Optional, Sequence
 
 import websockets
 try:
     import sounddevice as sd  # type: ignore
 except Exception as _e:
     sd = None  # type: ignore
+try:
+    # import once at load: pydub's import alone is slow enough to delay playback
+    from pydub import AudioSegment  # type: ignore
+    import simpleaudio as sa  # type: ignore
+    _PYDUB_OK = True
+except Exception:
+    _PYDUB_OK = False
+
 
+def _tune_ws_socket(ws) -> None:
+    """Disable Nagle on the websocket's TCP socket so small PCM frames flush immediately."""
+    try:
+        sock = ws.transport.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except Exception:
+        pass
 
-def _build_headers(args: argparse.Namespace) -> List[tuple[str, str]]:
+
+_FLUSH_MSG = json.dumps({"type": "flush"})
+
+
+@functools.lru_cache(maxsize=None)
+def _build_headers(auth: Optional[str]) -> Sequence[tuple[str, str]]:
     headers: List[tuple[str, str]] = []
-    if args.auth:
-        headers.append(("Authorization", args.auth))
-    return headers
+    if auth:
+        headers.append(("Authorization", auth))
+    return tuple(headers)
 
 
-async def text_client(uri: str, query: Optional[str], headers: List[tuple[str, str]]):
+async def text_client(uri: str, query: Optional[str], headers: Sequence[tuple[str, str]]):
     async with websockets.connect(uri, extra_headers=headers) as ws:
         if query is not None:
             await ws.send(query)
             resp = await ws.recv()
-            print(resp)
+            print(resp.decode("utf-8") if isinstance(resp, bytes) else resp)
             return
         print("Connected. Type 'exit' to quit.")
         while True:
@@ -73,106 +94,350 @@ async def text_client(uri: str, query: Optional[str], headers: List[tuple[str, s
 
 
 def _play_mp3_bytes(mp3_bytes: bytes) -> bool:
-    """Try to play MP3 bytes. Prefer pydub+simpleaudio, else ffplay, else save file only.
+    """Try to play MP3 bytes. Prefer piping into ffplay/mpv (native stream decode),
+    else pydub+simpleaudio, else save file only.
     Returns True if played, False otherwise.
     """
-    # Try pydub + simpleaudio
+    # Try ffplay/mpv via stdin pipe: no tempfile, no Python-side decode
+    for cmd in (["ffplay", "-autoexit", "-nodisp", "-loglevel", "quiet", "-i", "pipe:0"],
+                ["mpv", "--no-video", "--really-quiet", "-"]):
+        if not shutil.which(cmd[0]):
+            continue
+        try:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            proc.communicate(mp3_bytes)
+            if proc.returncode == 0:
+                return True
+        except Exception:
+            pass
+    # Fallback: pydub + simpleaudio (full decode in Python, much slower)
+    if not _PYDUB_OK:
+        return False
     try:
-        from pydub import AudioSegment  # type: ignore
-        import simpleaudio as sa  # type: ignore
         audio = AudioSegment.from_file(io.BytesIO(mp3_bytes), format="mp3")
         play_obj = sa.play_buffer(audio.raw_data, num_channels=audio.channels, bytes_per_sample=audio.sample_width, sample_rate=audio.frame_rate)
         play_obj.wait_done()
         return True
     except Exception:
         pass
-    # Try ffplay
-    if shutil.which("ffplay"):
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as f:
-            f.write(mp3_bytes)
-            tmp = f.name
-        try:
-            subprocess.run(["ffplay", "-autoexit", "-nodisp", tmp], check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return True
-        finally:
+    return False
+
+
+_MAX_AUDIO_BUFFER_BYTES = 16 * 1024 * 1024
+
+
+class _StreamingMP3Player:
+    """Pipe MP3 chunks into ffplay as they arrive so playback overlaps download.
+
+    Falls back to buffering + `_play_mp3_bytes` when ffplay is unavailable. The
+    ffplay path gets backpressure for free from the blocking stdin writes; the
+    buffered path is capped and spills to a tempfile beyond `max_buffer_bytes`.
+    """
+
+    def __init__(self, max_buffer_bytes: int = _MAX_AUDIO_BUFFER_BYTES) -> None:
+        self._proc: Optional[subprocess.Popen] = None
+        self._chunks: List[bytes] = []
+        self._buffered = 0
+        self._max_buffer_bytes = max_buffer_bytes
+        self._spill = None
+        if shutil.which("ffplay"):
+            try:
+                self._proc = subprocess.Popen(
+                    ["ffplay", "-autoexit", "-nodisp", "-loglevel", "quiet", "-i", "pipe:0"],
+                    stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+            except Exception:
+                self._proc = None
+
+    def feed(self, chunk: bytes) -> None:
+        if self._proc is not None and self._proc.stdin is not None:
+            try:
+                self._proc.stdin.write(chunk)
+                self._proc.stdin.flush()
+                return
+            except Exception:
+                self._proc = None
+        self._chunks.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered > self._max_buffer_bytes:
+            self._spill_to_disk()
+
+    def _spill_to_disk(self) -> None:
+        if self._spill is None:
+            self._spill = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
+        for chunk in self._chunks:
+            self._spill.write(chunk)
+        self._chunks.clear()
+        self._buffered = 0
+
+    def finish(self) -> None:
+        """Close the pipe and wait for playback; handle the buffered fallback."""
+        if self._proc is not None and self._proc.stdin is not None:
             try:
-                os.remove(tmp)
+                self._proc.stdin.close()
+                self._proc.wait()
+                return
             except Exception:
                 pass
-    return False
+        if self._spill is not None:
+            self._spill_to_disk()
+            tmp = self._spill.name
+            self._spill.close()
+            print(f"TTS 音频超过内存上限，已保存到: {tmp}")
+            return
+        if not self._chunks:
+            return
+        mp3_data = b"".join(self._chunks)
+        self._chunks.clear()
+        if not _play_mp3_bytes(mp3_data):
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as f:
+                f.write(mp3_data)
+                tmp = f.name
+            print(f"已保存 TTS 音频到: {tmp}")
+
+
+class _StreamingPCMPlayer:
+    """Play raw PCM16 chunks via sounddevice as they arrive — no decode step at all."""
+
+    def __init__(self, samplerate: int = 24000) -> None:
+        self._stream = None
+        if sd is not None:
+            try:
+                self._stream = sd.RawOutputStream(samplerate=samplerate, channels=1, dtype='int16')
+                self._stream.start()
+            except Exception:
+                self._stream = None
+
+    def feed(self, chunk: bytes) -> None:
+        if self._stream is not None:
+            try:
+                self._stream.write(chunk)
+            except Exception:
+                pass
+
+    def finish(self) -> None:
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+
+
+class _FormatSniffingPlayer:
+    """Pick the real player from the first audio frame instead of trusting --accept.
+
+    The server may ignore the pcm16 config frame and keep sending MP3; an ID3
+    tag or MP3 sync bytes at the start of the first frame reveal that, and the
+    wrapper then routes the stream to the MP3 player instead of writing
+    compressed bytes into a raw PCM output.
+    """
+
+    def __init__(self, max_buffer_bytes: int = _MAX_AUDIO_BUFFER_BYTES) -> None:
+        self._player = None
+        self._max_buffer_bytes = max_buffer_bytes
+
+    @staticmethod
+    def _looks_like_mp3(chunk: bytes) -> bool:
+        if chunk.startswith(b"ID3"):
+            return True
+        return len(chunk) >= 2 and chunk[0] == 0xFF and (chunk[1] & 0xE0) == 0xE0
+
+    def feed(self, chunk: bytes) -> None:
+        if self._player is None:
+            if self._looks_like_mp3(chunk):
+                print("服务器未按 pcm16 返回，回退到 MP3 播放。")
+                self._player = _StreamingMP3Player(max_buffer_bytes=self._max_buffer_bytes)
+            else:
+                self._player = _StreamingPCMPlayer()
+        self._player.feed(chunk)
+
+    def finish(self) -> None:
+        if self._player is not None:
+            self._player.finish()
 
 
 class KeyWatcher:
+    """Watch stdin for a trigger key with `loop.add_reader`.
+
+    No polling thread: the event loop wakes us only when stdin is readable.
+    `watch()` arms a fresh asyncio.Event; `stop()` restores the terminal so
+    regular `input()`/`readline()` prompts keep working between turns.
+    """
+
     def __init__(self, trigger_key: str = "s") -> None:
         self.trigger_key = trigger_key
-        self._thread: Optional[threading.Thread] = None
+        self._fd = sys.stdin.fileno()
+        self._old: Optional[list] = None
+        self._event: Optional[asyncio.Event] = None
+
+    def watch(self) -> asyncio.Event:
+        self._event = asyncio.Event()
+        if self._old is None:
+            self._old = termios.tcgetattr(self._fd)
+            tty.setcbreak(self._fd)
+            asyncio.get_running_loop().add_reader(self._fd, self._on_readable)
+        return self._event
+
+    def stop(self) -> None:
+        if self._old is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            termios.tcsetattr(self._fd, termios.TCSADRAIN, self._old)
+            self._old = None
+        self._event = None
+
+    def _on_readable(self) -> None:
+        try:
+            ch = os.read(self._fd, 1).decode(errors="ignore")
+        except OSError:
+            return
+        if ch.lower() == self.trigger_key and self._event is not None:
+            self._event.set()
+
 
-    def start(self, event: threading.Event) -> None:
-        self._thread = threading.Thread(target=self._run, args=(event,), daemon=True)
-        self._thread.start()
+async def _collect_audio_reply(ws, player, first_msg, idle_timeout: float = 30.0) -> None:
+    """Feed TTS audio frames into `player` until audio_end / a new text event.
 
-    def _run(self, event: threading.Event) -> None:
-        fd = sys.stdin.fileno()
-        old = termios.tcgetattr(fd)
+    `first_msg` is the first frame received after flush — normally the JSON
+    answer, but servers may send audio first. The timeout is only a safety
+    net against a stalled server.
+    """
+    if isinstance(first_msg, str):
+        print(first_msg)
+    else:
+        # unexpected binary first; then expect text
+        player.feed(first_msg)
+        while True:
+            m = await ws.recv()
+            if isinstance(m, str):
+                print(m)
+                break
+            player.feed(m)
+
+    while True:
         try:
-            tty.setcbreak(fd)
-            while not event.is_set():
-                r, _, _ = select.select([sys.stdin], [], [], 0.1)
-                if not r:
-                    continue
-                ch = sys.stdin.read(1)
-                if not ch:
-                    continue
-                if ch.lower() == self.trigger_key:
-                    event.set()
-                    break
-        finally:
-            termios.tcsetattr(fd, termios.TCSADRAIN, old)
-
-
-async def audio_client_realtime(uri: str, headers: List[tuple[str, str]], chunk_ms: int = 20) -> None:
-    if sd is None:
-        print("sounddevice 未安装，无法进行语音交互。请先 pip install sounddevice", file=sys.stderr)
-        return
-    samplerate = 16000
-    channels = 1
-    blocksize = max(1, int(samplerate * chunk_ms / 1000))  # samples per block
-    q: "queue.Queue[bytes]" = queue.Queue(maxsize=50)
+            m = await asyncio.wait_for(ws.recv(), timeout=idle_timeout)
+        except asyncio.TimeoutError:
+            break
+        if isinstance(m, bytes):
+            player.feed(m)
+            continue
+        try:
+            obj = json.loads(m)
+        except Exception:
+            obj = {}
+        if obj.get("type") == "audio_end":
+            break
+        if obj.get("type") == "partial" or "answer" in obj:
+            # sentence-streaming servers interleave partial text / the final
+            # answer with audio frames; keep collecting until audio_end
+            print(m)
+            continue
+        # received text - treat as new event; print and stop collecting audio
+        print(m)
+        break
+    player.finish()
+
+
+def _make_audio_bridge(maxsize: int, blocksize: int):
+    """Bridge the sounddevice callback thread to asyncio without polling.
+
+    Returns (aq, slab_pool, callback): the callback copies each block into a
+    recycled slab and hands it to the event loop via `call_soon_threadsafe`,
+    so the consumer awaits the queue instead of spinning on 50ms timeouts.
+    """
+    loop = asyncio.get_running_loop()
+    aq: "asyncio.Queue[tuple[bytearray, int]]" = asyncio.Queue(maxsize=maxsize)
+    # Reusable slabs so the realtime callback copies into preallocated buffers
+    # instead of allocating a fresh bytes object per block.
+    slab_pool: "collections.deque[bytearray]" = collections.deque(bytearray(blocksize * 2) for _ in range(64))
+
+    def _enqueue(slab: bytearray, nbytes: int) -> None:
+        # Runs on the event loop thread; drop the oldest block when full
+        if aq.full():
+            try:
+                old, _ = aq.get_nowait()
+                slab_pool.append(old)
+            except asyncio.QueueEmpty:
+                pass
+        aq.put_nowait((slab, nbytes))
 
     def _callback(indata, frames, time, status):  # type: ignore
         if status:
             # print status to stderr but don't spam
             pass
+        nbytes = len(indata)
         try:
-            q.put_nowait(bytes(indata))
-        except queue.Full:
-            try:
-                q.get_nowait()
-            except Exception:
-                pass
-            q.put_nowait(bytes(indata))
+            slab = slab_pool.popleft()
+        except IndexError:
+            slab = bytearray(nbytes)
+        if len(slab) < nbytes:
+            slab = bytearray(nbytes)
+        memoryview(slab)[:nbytes] = indata
+        try:
+            loop.call_soon_threadsafe(_enqueue, slab, nbytes)
+        except RuntimeError:
+            pass
+
+    return aq, slab_pool, _callback
+
+
+async def _get_audio_or_event(aq: "asyncio.Queue[tuple[bytearray, int]]", event_task: "asyncio.Task") -> Optional[tuple]:
+    """Await the next audio block, or return None once `event_task` completes."""
+    get_task = asyncio.ensure_future(aq.get())
+    done, _ = await asyncio.wait({get_task, event_task}, return_when=asyncio.FIRST_COMPLETED)
+    if get_task in done:
+        return get_task.result()
+    get_task.cancel()
+    return None
+
+
+async def audio_client_realtime(uri: str, headers: Sequence[tuple[str, str]], chunk_ms: int = 20, coalesce_blocks: int = 8, max_audio_mb: int = 16, accept: str = "mp3") -> None:
+    if sd is None:
+        print("sounddevice 未安装，无法进行语音交互。请先 pip install sounddevice", file=sys.stderr)
+        return
+    samplerate = 16000
+    channels = 1
+    blocksize = max(1, int(samplerate * chunk_ms / 1000))  # samples per block
+    aq, slab_pool, _callback = _make_audio_bridge(maxsize=50, blocksize=blocksize)
 
     print("连接中... 按 's' 发送(保存)并等待结果，Ctrl+C 退出。")
-    async with websockets.connect(uri, extra_headers=headers, max_size=None) as ws:
+    watcher = KeyWatcher('s')
+    async with websockets.connect(uri, extra_headers=headers, max_size=None, max_queue=None, compression=None, write_limit=2 ** 20, read_limit=2 ** 20) as ws:
+        _tune_ws_socket(ws)
+        if accept == "pcm16":
+            # Ask the server for raw PCM16 so playback skips the MP3 decode;
+            # servers without PCM support ignore this frame and keep sending MP3.
+            await ws.send(json.dumps({"type": "config", "accept": "pcm16", "sample_rate": 24000}))
         while True:
-            flush_event = threading.Event()
-            watcher = KeyWatcher('s')
-            watcher.start(flush_event)
+            flush_event = watcher.watch()
+            flush_task = asyncio.ensure_future(flush_event.wait())
             print("开始录音... (按 's' 发送)")
             with sd.RawInputStream(samplerate=samplerate, channels=channels, dtype='int16', blocksize=blocksize, callback=_callback):
                 # stream audio until 's'
                 try:
-                    while not flush_event.is_set():
-                        try:
-                            chunk = q.get(timeout=0.05)
-                        except queue.Empty:
-                            continue
-                        await ws.send(chunk)
+                    while True:
+                        item = await _get_audio_or_event(aq, flush_task)
+                        if item is None:
+                            break
+                        chunks = [item]
+                        # Coalesce whatever is already queued into one frame to
+                        # avoid a websocket send per 20ms block.
+                        while len(chunks) < coalesce_blocks:
+                            try:
+                                chunks.append(aq.get_nowait())
+                            except asyncio.QueueEmpty:
+                                break
+                        await ws.send(b"".join(memoryview(slab)[:n] for slab, n in chunks))
+                        slab_pool.extend(slab for slab, _ in chunks)
                 except KeyboardInterrupt:
                     print("收到中断，退出。")
+                    watcher.stop()
                     return
+            watcher.stop()
             # send flush
-            await ws.send(json.dumps({"type": "flush"}))
+            await ws.send(_FLUSH_MSG)
             print("已发送，等待应答...")
 
             # First expect JSON answer
@@ -181,41 +446,11 @@ async def audio_client_realtime(uri: str, headers: List[tuple[str, str]], chunk_
             except asyncio.TimeoutError:
                 print("等待应答超时。")
                 continue
-            mp3_chunks: List[bytes] = []
-            if isinstance(msg, str):
-                print(msg)
+            if accept == "pcm16":
+                player = _FormatSniffingPlayer(max_buffer_bytes=max_audio_mb * 1024 * 1024)
             else:
-                # unexpected binary first
-                mp3_chunks.append(msg)
-                # then expect text
-                while True:
-                    m = await ws.recv()
-                    if isinstance(m, str):
-                        print(m)
-                        break
-                    mp3_chunks.append(m)
-
-            # collect audio with short timeout
-            while True:
-                try:
-                    m = await asyncio.wait_for(ws.recv(), timeout=0.6)
-                except asyncio.TimeoutError:
-                    break
-                if isinstance(m, bytes):
-                    mp3_chunks.append(m)
-                else:
-                    # received text - treat as new event; print and stop collecting audio
-                    print(m)
-                    break
-
-            if mp3_chunks:
-                mp3_data = b"".join(mp3_chunks)
-                played = _play_mp3_bytes(mp3_data)
-                if not played:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as f:
-                        f.write(mp3_data)
-                        tmp = f.name
-                    print(f"已保存 TTS 音频到: {tmp}")
+                player = _StreamingMP3Player(max_buffer_bytes=max_audio_mb * 1024 * 1024)
+            await _collect_audio_reply(ws, player, msg)
             # next turn or quit
             print("按 Enter 开始下一轮，输入 q 回车退出：", end="", flush=True)
             try:
@@ -226,82 +461,180 @@ async def audio_client_realtime(uri: str, headers: List[tuple[str, str]], chunk_
                 break
 
 
-def _post_audio_http(url: str, audio_bytes: bytes, headers: List[tuple[str, str]]) -> bytes:
-    req = urllib.request.Request(url, data=audio_bytes, method="POST")
-    req.add_header("Content-Type", "audio/pcm")
-    for key, value in headers:
-        req.add_header(key, value)
-    try:
-        with urllib.request.urlopen(req) as resp:
-            return resp.read()
-    except urllib.error.HTTPError as e:
+def _load_wav_to_pcm16_mono_16k(path: str) -> bytes:
+    """Load a WAV file and convert to 16kHz mono PCM16 in one NumPy pass."""
+    import wave
+
+    import numpy as np  # type: ignore
+
+    with wave.open(path, "rb") as wf:
+        nch = wf.getnchannels()
+        width = wf.getsampwidth()
+        sr = wf.getframerate()
+        data = wf.readframes(wf.getnframes())
+    if width == 2:
+        arr = np.frombuffer(data, dtype=np.int16)
+    elif width == 4:
+        arr = (np.frombuffer(data, dtype=np.int32) >> 16).astype(np.int16)
+    elif width == 1:
+        arr = (np.frombuffer(data, dtype=np.uint8).astype(np.int16) - 128) << 8
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width}")
+    if nch > 1:
+        arr = arr.reshape(-1, nch).mean(axis=1).astype(np.int16)
+    if sr != 16000:
+        try:
+            from scipy.signal import resample_poly  # type: ignore
+
+            arr = resample_poly(arr.astype(np.float32), 16000, sr).astype(np.int16)
+        except Exception:
+            # Nearest-sample fallback when scipy is unavailable
+            idx = (np.arange(int(len(arr) * 16000 / sr)) * (sr / 16000)).astype(np.int64)
+            arr = arr[np.minimum(idx, len(arr) - 1)]
+    return arr.tobytes()
+
+
+async def audio_client(uri: str, headers: Sequence[tuple[str, str]], wav_path: str, chunk_ms: int = 240) -> None:
+    """Stream a local WAV file to /ws/rt as PCM16LE 16kHz mono, then play the reply."""
+    pcm = _load_wav_to_pcm16_mono_16k(wav_path)
+    sz = int(16000 * 2 * chunk_ms / 1000)
+    async with websockets.connect(uri, extra_headers=headers, max_size=None, max_queue=None, compression=None, write_limit=2 ** 20, read_limit=2 ** 20) as ws:
+        _tune_ws_socket(ws)
+        # memoryview slices avoid a copy per chunk; offline upload has no
+        # realtime pacing constraint so backpressure comes from write_limit.
+        mv = memoryview(pcm)
+        for i in range(0, len(pcm), sz):
+            await ws.send(mv[i:i + sz])
+        await ws.send(_FLUSH_MSG)
+        try:
+            msg = await asyncio.wait_for(ws.recv(), timeout=30.0)
+        except asyncio.TimeoutError:
+            print("等待应答超时。")
+            return
+        await _collect_audio_reply(ws, _StreamingMP3Player(), msg)
+
+
+class _NrtHttpSession:
+    """Keep-alive HTTP session for /nrt so TCP/TLS setup is paid once, not per turn.
+
+    Streams the body with chunked transfer encoding so the server can start
+    decoding before the upload completes, without buffering one big payload.
+    """
+
+    def __init__(self, url: str, headers: Sequence[tuple[str, str]]) -> None:
+        parsed = urllib.parse.urlsplit(url)
+        self._scheme = parsed.scheme
+        self._host = parsed.hostname or ""
+        self._port = parsed.port
+        self._path = parsed.path or "/"
+        self._headers = headers
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._scheme == "https":
+            conn: http.client.HTTPConnection = http.client.HTTPSConnection(self._host, self._port)
+        else:
+            conn = http.client.HTTPConnection(self._host, self._port)
+        conn.connect()
         try:
-            body = e.read()
+            conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # type: ignore[union-attr]
         except Exception:
-            body = b""
-        print(f"HTTP {e.code}: {body[:200]!r}", file=sys.stderr)
-        return b""
-    except Exception as e:
-        print(f"HTTP 请求失败: {e}", file=sys.stderr)
+            pass
+        return conn
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def post_audio(self, audio_chunks: Iterable[bytes]) -> bytes:
+        # One retry on a stale keep-alive connection
+        for attempt in range(2):
+            if self._conn is None:
+                try:
+                    self._conn = self._connect()
+                except Exception as e:
+                    print(f"HTTP 连接失败: {e}", file=sys.stderr)
+                    return b""
+            conn = self._conn
+            try:
+                conn.putrequest("POST", self._path)
+                conn.putheader("Content-Type", "audio/pcm")
+                conn.putheader("Transfer-Encoding", "chunked")
+                for key, value in self._headers:
+                    conn.putheader(key, value)
+                conn.endheaders()
+                for chunk in audio_chunks:
+                    if chunk:
+                        conn.send(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                conn.send(b"0\r\n\r\n")
+                resp = conn.getresponse()
+                body = resp.read()
+                if resp.will_close:
+                    self._close()
+                if resp.status >= 400:
+                    print(f"HTTP {resp.status}: {body[:200]!r}", file=sys.stderr)
+                    return b""
+                return body
+            except Exception as e:
+                self._close()
+                if attempt:
+                    print(f"HTTP 请求失败: {e}", file=sys.stderr)
+                    return b""
         return b""
 
 
-async def audio_client_non_realtime_http(uri: str, headers: List[tuple[str, str]]) -> None:
+async def audio_client_non_realtime_http(uri: str, headers: Sequence[tuple[str, str]]) -> None:
     if sd is None:
         print("sounddevice 未安装，无法进行语音交互。请先 pip install sounddevice", file=sys.stderr)
         return
     samplerate = 16000
     channels = 1
     blocksize = 1024  # samples per block
-    q: "queue.Queue[bytes]" = queue.Queue(maxsize=200)
-
-    def _callback(indata, frames, time, status):  # type: ignore
-        if status:
-            pass
-        try:
-            q.put_nowait(bytes(indata))
-        except queue.Full:
-            try:
-                q.get_nowait()
-            except Exception:
-                pass
-            q.put_nowait(bytes(indata))
+    aq, slab_pool, _callback = _make_audio_bridge(maxsize=200, blocksize=blocksize)
 
     print("按 's' 开始录音，再按 's' 停止并发送，Ctrl+C 退出。")
+    session = _NrtHttpSession(uri, headers)
+    watcher = KeyWatcher('s')
     while True:
-        start_event = threading.Event()
-        KeyWatcher('s').start(start_event)
+        start_event = watcher.watch()
         print("等待开始...")
-        while not start_event.is_set():
-            await asyncio.sleep(0.05)
+        await start_event.wait()
 
-        stop_event = threading.Event()
-        KeyWatcher('s').start(stop_event)
-        while not q.empty():
+        stop_event = watcher.watch()
+        stop_task = asyncio.ensure_future(stop_event.wait())
+        while not aq.empty():
             try:
-                q.get_nowait()
-            except Exception:
+                slab, _ = aq.get_nowait()
+                slab_pool.append(slab)
+            except asyncio.QueueEmpty:
                 break
-        audio_buf = bytearray()
+        audio_chunks: List[bytes] = []
         print("开始录音... (按 's' 停止)")
         with sd.RawInputStream(samplerate=samplerate, channels=channels, dtype='int16', blocksize=blocksize, callback=_callback):
             try:
-                while not stop_event.is_set():
-                    try:
-                        chunk = q.get(timeout=0.05)
-                    except queue.Empty:
-                        continue
-                    audio_buf.extend(chunk)
+                while True:
+                    item = await _get_audio_or_event(aq, stop_task)
+                    if item is None:
+                        break
+                    slab, nbytes = item
+                    audio_chunks.append(bytes(memoryview(slab)[:nbytes]))
+                    slab_pool.append(slab)
             except KeyboardInterrupt:
                 print("收到中断，退出。")
+                watcher.stop()
                 return
+        watcher.stop()
 
-        if not audio_buf:
+        if not audio_chunks:
             print("未录到音频，重试。")
             continue
 
         print("录音完成，发送中...")
-        mp3_data = await asyncio.to_thread(_post_audio_http, uri, bytes(audio_buf), headers)
+        mp3_data = await asyncio.to_thread(session.post_audio, audio_chunks)
         if mp3_data:
             played = _play_mp3_bytes(mp3_data)
             if not played:
@@ -325,15 +658,30 @@ def main() -> None:
     parser.add_argument("--url", required=True, help="URL, e.g. ws://host:9000/ws, ws://host:9000/ws/rt, or http://host:9000/nrt")
     parser.add_argument("--query", default=None, help="Text mode: one-shot query. Omit to enter interactive mode.")
     parser.add_argument("--chunk-ms", type=int, default=20, help="Audio chunk size (ms) in realtime mode")
+    parser.add_argument("--coalesce-blocks", type=int, default=8, help="Max queued audio blocks merged into one websocket frame")
+    parser.add_argument("--max-audio-mb", type=int, default=16, help="Max MB of TTS audio buffered in memory before spilling to disk")
+    parser.add_argument("--accept", choices=["mp3", "pcm16"], default="mp3", help="Preferred TTS audio format in realtime mode")
+    parser.add_argument("--wav", default=None, help="Realtime mode: stream this WAV file instead of the microphone")
     parser.add_argument("--auth", default=None, help="Authorization header if needed, e.g. 'Bearer xxx'")
     args = parser.parse_args()
 
-    headers = _build_headers(args)
+    if sys.platform == "linux":
+        try:
+            import uvloop  # type: ignore
+
+            uvloop.install()
+        except ImportError:
+            pass
+
+    headers = _build_headers(args.auth)
     if args.url.endswith("/ws"):
         asyncio.run(text_client(args.url, args.query, headers))
         return
     if args.url.endswith("/ws/rt"):
-        asyncio.run(audio_client_realtime(args.url, headers, chunk_ms=args.chunk_ms))
+        if args.wav:
+            asyncio.run(audio_client(args.url, headers, args.wav, chunk_ms=max(args.chunk_ms, 240)))
+        else:
+            asyncio.run(audio_client_realtime(args.url, headers, chunk_ms=args.chunk_ms, coalesce_blocks=args.coalesce_blocks, max_audio_mb=args.max_audio_mb, accept=args.accept))
         return
     if args.url.startswith("http") and args.url.endswith("/nrt"):
         asyncio.run(audio_client_non_realtime_http(args.url, headers))
@@ -29,6 +29,18 @@ def _download_repo_files(repo_id: str, revision: str | None) -> None:
         print("Missing dependency: huggingface_hub. Install faster-whisper first.", file=sys.stderr)
         raise SystemExit(1) from exc
 
+    # Prefer snapshot_download: parallel file downloads with resume + progress,
+    # so wall time is bounded by the largest file instead of the sum.
+    try:
+        from huggingface_hub import snapshot_download  # type: ignore
+    except Exception:
+        snapshot_download = None
+    if snapshot_download is not None:
+        print(f"Downloading model files for {repo_id}")
+        snapshot_download(repo_id=repo_id, revision=revision, repo_type="model", max_workers=8)
+        print("Done.")
+        return
+
     api = HfApi()
     files: List[str] = api.list_repo_files(repo_id=repo_id, revision=revision, repo_type="model")
     if not files:
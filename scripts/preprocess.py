@@ -23,11 +23,14 @@ from __future__ import annotations
 
 import argparse
 import json
+import re
 from pathlib import Path
 from typing import Dict, List, Optional
 
 import pandas as pd
 
+STEP_RE = re.compile(r"usr_query(\d+)")
+
 
 def _to_str(x: object) -> str:
     if x is None:
@@ -38,39 +41,29 @@ def _to_str(x: object) -> str:
     return s.strip()
 
 
-def _build_items_from_row(row: pd.Series, row_idx: int, source_name: str) -> List[Dict]:
+def _build_items_for_row(
+    row_idx: int,
+    source_name: str,
+    row_ids,
+    sys1_col,
+    step_cols,
+) -> List[Dict]:
     items: List[Dict] = []
-    row_id_base = _to_str(row.get("序号")) or f"{source_name}-{row_idx}"
+    row_id_base = (_to_str(row_ids[row_idx]) if row_ids is not None else "") or f"{source_name}-{row_idx}"
 
     # Collect conversation context incrementally
     context: List[Dict[str, str]] = []
 
     # Seed with first system response if present
-    sys1 = _to_str(row.get("sys_response1"))
+    sys1 = _to_str(sys1_col[row_idx]) if sys1_col is not None else ""
     if sys1:
         context.append({"role": "system", "text": sys1})
 
-    # We expect even user turns (2,4,...) and following odd system responses (3,5,...)
-    # Detect all columns and determine max step
-    steps: List[int] = []
-    for col in row.index:
-        if isinstance(col, str) and col.startswith("usr_query"):
-            try:
-                step = int(col.replace("usr_query", ""))
-                steps.append(step)
-            except ValueError:
-                pass
-    steps = sorted(set(steps))
-
-    for step in steps:
+    for step, q_col, i_col, a_col in step_cols:
         # Current user turn
-        q_col = f"usr_query{step}"
-        i_col = f"usr_intent{step}"
-        a_col = f"sys_response{step + 1}"
-
-        query = _to_str(row.get(q_col))
-        intent = _to_str(row.get(i_col)) or None
-        answer = _to_str(row.get(a_col))
+        query = _to_str(q_col[row_idx]) if q_col is not None else ""
+        intent = (_to_str(i_col[row_idx]) if i_col is not None else "") or None
+        answer = _to_str(a_col[row_idx]) if a_col is not None else ""
 
         # Skip if no valid pair
         if not query or not answer:
@@ -99,11 +92,38 @@ def _build_items_from_row(row: pd.Series, row_idx: int, source_name: str) -> Lis
     return items
 
 
+def _read_excel(path: Path) -> pd.DataFrame:
+    try:
+        # calamine (pandas >= 2.2 + python-calamine) parses XLSX much faster
+        # than the default openpyxl engine
+        return pd.read_excel(path, engine="calamine")
+    except (ImportError, ValueError):
+        return pd.read_excel(path)
+
+
 def process_file(path: Path) -> List[Dict]:
-    df = pd.read_excel(path)
+    df = _read_excel(path)
+
+    # We expect even user turns (2,4,...) and following odd system responses (3,5,...)
+    # Detect all columns once and pre-extract them as object arrays, so the row
+    # loop below indexes plain NumPy arrays instead of building a Series per row.
+    steps = sorted(
+        {int(m.group(1)) for col in df.columns if isinstance(col, str) and (m := STEP_RE.fullmatch(col))}
+    )
+
+    def _col(name: str):
+        return df[name].to_numpy(dtype=object) if name in df.columns else None
+
+    row_ids = _col("序号")
+    sys1_col = _col("sys_response1")
+    step_cols = [
+        (step, _col(f"usr_query{step}"), _col(f"usr_intent{step}"), _col(f"sys_response{step + 1}"))
+        for step in steps
+    ]
+
     items: List[Dict] = []
-    for idx, row in df.iterrows():
-        items.extend(_build_items_from_row(row, idx, path.stem))
+    for idx in range(len(df)):
+        items.extend(_build_items_for_row(idx, path.stem, row_ids, sys1_col, step_cols))
     return items
 
 
@@ -126,10 +146,22 @@ def main() -> None:
     for f in xlsx_files:
         all_items.extend(process_file(f))
 
-    with output_path.open("w", encoding="utf-8") as w:
-        for obj in all_items:
-            json.dump(obj, w, ensure_ascii=False)
-            w.write("\n")
+    try:
+        import orjson  # type: ignore
+    except ImportError:
+        orjson = None
+
+    with output_path.open("wb") as w:
+        if orjson is not None:
+            # orjson emits UTF-8 without escaping non-ASCII, matching
+            # ensure_ascii=False; write in batches to amortize syscalls.
+            lines = [orjson.dumps(obj) + b"\n" for obj in all_items]
+            for i in range(0, len(lines), 1000):
+                w.writelines(lines[i : i + 1000])
+        else:
+            for obj in all_items:
+                w.write(json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+                w.write(b"\n")
 
     print(f"Wrote {len(all_items)} items to {output_path}")
 
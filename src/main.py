@@ -26,7 +26,7 @@ def main() -> None:
         return
 
     items = load_qa_pairs(data_path)
-    pipeline = ChatPipeline(config, items)
+    pipeline = ChatPipeline(config, items, index_source=data_path)
 
     context: list = []
     print("Chatbot pipeline ready. Type 'exit' to quit.")
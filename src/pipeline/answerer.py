@@ -2,6 +2,8 @@ from typing import List
 
 from .types import AnswerPayload, RetrievalCandidate
 
+LLM_PROMPT_TEMPLATE = "问题：{question}\n\n已检索到的知识片段：\n{evidence}\n\n请基于以上内容作答。"
+
 
 def build_answer(
     question: str,
@@ -16,7 +18,7 @@ def build_answer(
     return AnswerPayload(
         answer=formatted,
         citations=[top.id],
-        confidence=top.scores.get("final", 0.0),
+        confidence=top.final,
         fallback=False,
     )
 
@@ -24,8 +26,5 @@ def build_answer(
 def build_llm_prompt(question: str, candidates: List[RetrievalCandidate]) -> str:
     if not candidates:
         return question
-    parts = []
-    for idx, cand in enumerate(candidates, start=1):
-        parts.append(f"{idx}. {cand.answer}")
-    evidence = "\n".join(parts)
-    return f"问题：{question}\n\n已检索到的知识片段：\n{evidence}\n\n请基于以上内容作答。"
+    evidence = "\n".join(f"{idx}. {cand.answer}" for idx, cand in enumerate(candidates, start=1))
+    return LLM_PROMPT_TEMPLATE.format(question=question, evidence=evidence)
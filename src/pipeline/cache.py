@@ -1,22 +1,45 @@
 import time
-from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
 
 
 class SimpleTTLCache:
-    def __init__(self, ttl_seconds: int) -> None:
+    """TTL cache with LRU eviction bounded by `max_entries`.
+
+    Uses `time.monotonic` so entries are immune to wall-clock jumps.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int = 1024) -> None:
         self.ttl_seconds = ttl_seconds
-        self._store: Dict[str, Tuple[float, Any]] = {}
+        self.max_entries = max_entries
+        self._store: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
 
     def get(self, key: str) -> Optional[Any]:
         item = self._store.get(key)
         if not item:
             return None
         expires_at, value = item
-        if expires_at < time.time():
+        now = time.monotonic()
+        if expires_at < now:
             self._store.pop(key, None)
+            self._evict_expired(now)
             return None
+        self._store.move_to_end(key)
         return value
 
     def set(self, key: str, value: Any) -> None:
-        expires_at = time.time() + self.ttl_seconds
-        self._store[key] = (expires_at, value)
+        now = time.monotonic()
+        self._store[key] = (now + self.ttl_seconds, value)
+        self._store.move_to_end(key)
+        if len(self._store) > self.max_entries:
+            self._evict_expired(now)
+            while len(self._store) > self.max_entries:
+                self._store.popitem(last=False)
+
+    def _evict_expired(self, now: float) -> None:
+        # Evict from the LRU end until the first unexpired entry
+        while self._store:
+            _, (expires_at, _) = next(iter(self._store.items()))
+            if expires_at >= now:
+                break
+            self._store.popitem(last=False)
@@ -1,18 +1,59 @@
+import re
 from typing import List, Optional
 
 from .types import AnswerPayload
 
 
+class SensitiveKeywordMatcher:
+    """One-pass matcher over the sensitive keyword list, built once at init.
+
+    Prefers an Aho-Corasick automaton (pyahocorasick) when installed, else a
+    single alternation regex — either way one C-level scan per query instead
+    of a Python loop over every keyword.
+    """
+
+    def __init__(self, keywords: List[str]) -> None:
+        keywords = [k for k in keywords if k]
+        self._automaton = None
+        self._regex = None
+        self._first_char_table = None
+        if not keywords:
+            return
+        # Deleting every keyword first-char is one C-level translate; if the
+        # query length is unchanged, no keyword can match and the scan is
+        # skipped — the common case for clean traffic.
+        self._first_char_table = str.maketrans("", "", "".join({k[0] for k in keywords}))
+        try:
+            import ahocorasick  # type: ignore
+        except ImportError:
+            ahocorasick = None
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for keyword in keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+        else:
+            self._regex = re.compile("|".join(map(re.escape, keywords)))
+
+    def search(self, query: str) -> bool:
+        if self._first_char_table is not None and len(query.translate(self._first_char_table)) == len(query):
+            return False
+        if self._automaton is not None:
+            return next(self._automaton.iter(query), None) is not None
+        if self._regex is not None:
+            return self._regex.search(query) is not None
+        return False
+
+
 def apply_guardrails(
     query: str,
     refuse_template: str,
-    sensitive_keywords: List[str],
+    keyword_matcher: SensitiveKeywordMatcher,
     out_of_scope_policy: str,
 ) -> Optional[AnswerPayload]:
-    if sensitive_keywords:
-        for keyword in sensitive_keywords:
-            if keyword and keyword in query:
-                return AnswerPayload(answer=refuse_template.strip(), citations=[], confidence=0.0, fallback=True)
+    if keyword_matcher.search(query):
+        return AnswerPayload(answer=refuse_template.strip(), citations=[], confidence=0.0, fallback=True)
 
     if out_of_scope_policy == "refuse" and not query.strip():
         return AnswerPayload(answer=refuse_template.strip(), citations=[], confidence=0.0, fallback=True)
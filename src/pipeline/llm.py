@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Iterator, Optional
 
 
 class LocalQwenLLM:
@@ -71,3 +71,42 @@ class LocalQwenLLM:
         )
         generated = outputs[0][input_ids.shape[-1]:]
         return tokenizer.decode(generated, skip_special_tokens=True).strip()
+
+    def generate_stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        """Yield decoded text pieces as generation progresses.
+
+        Generation runs on a worker thread feeding a TextIteratorStreamer,
+        so callers can forward partial output while decoding continues.
+        """
+        self._ensure_model()
+        import threading
+
+        from transformers import TextIteratorStreamer  # type: ignore
+
+        tokenizer = self._tokenizer
+        model = self._model
+        if tokenizer is None or model is None:
+            return
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        input_ids = tokenizer.apply_chat_template(messages, add_generation_prompt=True, return_tensors="pt")
+        input_ids = input_ids.to(model.device)
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        kwargs = dict(
+            inputs=input_ids,
+            max_new_tokens=self.max_new_tokens,
+            do_sample=self.temperature > 0,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            eos_token_id=tokenizer.eos_token_id,
+            pad_token_id=tokenizer.eos_token_id,
+            streamer=streamer,
+        )
+        thread = threading.Thread(target=model.generate, kwargs=kwargs, daemon=True)
+        thread.start()
+        for piece in streamer:
+            if piece:
+                yield piece
+        thread.join()
@@ -4,20 +4,27 @@ from typing import List
 
 from .types import KnowledgeItem, Message
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
 
 def load_qa_pairs(path: str) -> List[KnowledgeItem]:
     data_path = Path(path)
     if not data_path.exists():
         raise FileNotFoundError(f"QA data not found: {data_path}")
 
+    loads = orjson.loads if orjson is not None else json.loads
     items: List[KnowledgeItem] = []
-    with data_path.open("r", encoding="utf-8") as f:
+    with data_path.open("rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            record = json.loads(line)
-            context = [Message(**msg) for msg in record.get("context", [])]
+            record = loads(line)
+            # Positional construction skips per-message kwargs unpacking
+            context = [Message(msg["role"], msg["text"]) for msg in record.get("context", [])]
             items.append(
                 KnowledgeItem(
                     id=record.get("id", ""),
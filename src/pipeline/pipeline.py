@@ -1,54 +1,181 @@
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 from .answerer import build_answer, build_llm_prompt
 from .cache import SimpleTTLCache
 from .gate import passes_confidence_gate
-from .guardrails import apply_guardrails
+from .guardrails import SensitiveKeywordMatcher, apply_guardrails
 from .rerank import rerank
 from .retrieval import Retriever
-from .text import contains_referential, normalize_text
+from .text import contains_referential, normalize_text, split_sentences
 from .types import AnswerPayload, KnowledgeItem, Message, RetrievalCandidate
 
 
 class ChatPipeline:
-    def __init__(self, config: Dict[str, Any], items: List[KnowledgeItem]) -> None:
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        items: List[KnowledgeItem],
+        index_source: Optional[str] = None,
+    ) -> None:
         self.config = config
         hybrid = config.get("retrieval", {}).get("hybrid", {})
+        # `index_source` must be the path `items` were actually loaded from;
+        # callers with a --data override pass it so the pickled BM25 index is
+        # keyed on the right file. Falls back to the configured source.
         self.retriever = Retriever(
             items,
             bm25_top_k=hybrid.get("bm25_top_k", 20),
             vector_top_k=hybrid.get("vector_top_k", 20),
+            index_source=index_source or config.get("retrieval", {}).get("index_source"),
+        )
+        self._keyword_matcher = SensitiveKeywordMatcher(
+            config.get("guardrails", {}).get("sensitive_keywords", [])
         )
         cache_cfg = config.get("cache", {})
-        self.answer_cache = SimpleTTLCache(cache_cfg.get("answer_cache_ttl_sec", 900))
-        self.retrieval_cache = SimpleTTLCache(cache_cfg.get("retrieval_cache_ttl_sec", 900))
+        max_entries = cache_cfg.get("max_entries", 1024)
+        self.answer_cache = SimpleTTLCache(cache_cfg.get("answer_cache_ttl_sec", 900), max_entries=max_entries)
+        self.retrieval_cache = SimpleTTLCache(cache_cfg.get("retrieval_cache_ttl_sec", 900), max_entries=max_entries)
         self._llm = None
 
+        # Flatten config lookups done on every respond() call into attributes;
+        # the nested dict chains only run once, here.
+        ctx_cfg = config.get("input", {}).get("context", {})
+        self._referential_tokens = ctx_cfg.get("referential_tokens", [])
+        self._min_query_len = ctx_cfg.get("min_query_len_for_context", 6)
+        self._max_turns = ctx_cfg.get("max_turns", 4)
+        self._trim_spaces = config.get("input", {}).get("normalize", {}).get("trim_spaces", True)
+        self._refuse_template = config.get("llm", {}).get("refuse_template", "")
+        self._oos_policy = config.get("guardrails", {}).get("out_of_scope_policy", "refuse")
+        weights = hybrid.get("merge_weights", {})
+        self._weight_vector = weights.get("vector", 0.6)
+        self._weight_bm25 = weights.get("bm25", 0.4)
+        self._intent_boost = config.get("rerank", {}).get("intent_boost", 0.0)
+        self._rerank_top_k = config.get("rerank", {}).get("top_k", 5)
+        gate_cfg = config.get("confidence_gate", {})
+        self._min_confidence = gate_cfg.get("min_confidence", 0.55)
+        self._min_margin = gate_cfg.get("min_margin", 0.05)
+        self._conflict_reject = gate_cfg.get("conflict_reject", True)
+        self._llm_provider = (config.get("llm", {}).get("provider") or "").lower()
+
     def respond(self, query: str, context: Union[List[Dict[str, str]], List[Message]]) -> AnswerPayload:
-        input_cfg = self.config.get("input", {})
-        ctx_cfg = input_cfg.get("context", {})
-        referential_tokens = ctx_cfg.get("referential_tokens", [])
-        min_len = ctx_cfg.get("min_query_len_for_context", 6)
-        max_turns = ctx_cfg.get("max_turns", 4)
+        normalized, combined_query, early, reranked, confidence = self._prepare(query, context)
+        if early is not None:
+            return early
+
+        if self._llm_provider in {"qwen_local", "qwen-local"}:
+            response = self._respond_with_llm(normalized, reranked, confidence)
+            self.answer_cache.set(combined_query, response)
+            return response
+
+        response = build_answer(normalized, reranked, self._refuse_template)
+        response.confidence = confidence
+        self.answer_cache.set(combined_query, response)
+        return response
+
+    def respond_stream(
+        self, query: str, context: Union[List[Dict[str, str]], List[Message]]
+    ) -> Iterator[Union[str, AnswerPayload]]:
+        """Yield answer sentences as they become available, then the payload.
+
+        The local-LLM path streams generation and emits each sentence as soon
+        as its terminator arrives, so TTS can start before decoding finishes;
+        all other paths (guardrail, caches, template answers) yield the
+        sentences of the finished answer. The final item is always the
+        complete AnswerPayload.
+        """
+        normalized, combined_query, early, reranked, confidence = self._prepare(query, context)
+        if early is not None:
+            yield from split_sentences(early.answer)
+            yield early
+            return
+
+        if self._llm_provider in {"qwen_local", "qwen-local"}:
+            self._ensure_llm()
+            prompt = build_llm_prompt(normalized, reranked)
+            system_prompt = self.config.get("llm", {}).get("system_prompt", "")
+            buffer = ""
+            pieces: List[str] = []
+            for piece in self._llm.generate_stream(system_prompt, prompt):
+                pieces.append(piece)
+                buffer += piece
+                sentences = split_sentences(buffer)
+                if len(sentences) > 1:
+                    # everything but the (possibly unterminated) last sentence
+                    for sentence in sentences[:-1]:
+                        yield sentence
+                    buffer = sentences[-1]
+            tail = buffer.strip()
+            if tail:
+                yield tail
+            answer_text = "".join(pieces).strip()
+            if not answer_text:
+                response = build_answer(normalized, reranked, self._refuse_template)
+                response.confidence = confidence
+            else:
+                response = AnswerPayload(
+                    answer=answer_text,
+                    citations=[cand.id for cand in reranked],
+                    confidence=confidence,
+                    fallback=False,
+                )
+            self.answer_cache.set(combined_query, response)
+            yield response
+            return
+
+        response = build_answer(normalized, reranked, self._refuse_template)
+        response.confidence = confidence
+        self.answer_cache.set(combined_query, response)
+        yield from split_sentences(response.answer)
+        yield response
 
-        normalize_cfg = input_cfg.get("normalize", {})
-        normalized = normalize_text(query) if normalize_cfg.get("trim_spaces", True) else query
+    def prewarm(self, query: str, context: Union[List[Dict[str, str]], List[Message]]) -> None:
+        """Speculatively warm the retrieval cache for an in-progress query.
+
+        Meant to be called with a partial ASR hypothesis while the user is
+        still speaking. If the final transcript ends up identical, respond()
+        finds the retrieval result already cached; otherwise the index and
+        tokenizer state are at least warm.
+        """
+        normalized = normalize_text(query) if self._trim_spaces else query
+        if not normalized or self._keyword_matcher.search(normalized):
+            return
+        context_messages = self._normalize_context(context)
+        combined_query = self._combine_query(
+            normalized, context_messages, self._referential_tokens, self._min_query_len, self._max_turns
+        )
+        if self.answer_cache.get(combined_query) is not None:
+            return
+        if self.retrieval_cache.get(combined_query) is None:
+            self.retrieval_cache.set(combined_query, self.retriever.retrieve(combined_query))
+
+    def _prepare(
+        self, query: str, context: Union[List[Dict[str, str]], List[Message]]
+    ) -> Tuple[str, str, Optional[AnswerPayload], List[RetrievalCandidate], float]:
+        """Run guardrails, caches, retrieval and the gate; stop before the LLM.
+
+        Returns (normalized, combined_query, early_payload, reranked,
+        confidence); `early_payload` is set when the answer is already decided
+        (guardrail hit, cache hit, no candidates, gate rejection).
+        """
+        normalized = normalize_text(query) if self._trim_spaces else query
 
         guardrail = apply_guardrails(
             normalized,
-            self.config.get("llm", {}).get("refuse_template", ""),
-            self.config.get("guardrails", {}).get("sensitive_keywords", []),
-            self.config.get("guardrails", {}).get("out_of_scope_policy", "refuse"),
+            self._refuse_template,
+            self._keyword_matcher,
+            self._oos_policy,
         )
         if guardrail:
-            return guardrail
+            return normalized, "", guardrail, [], 0.0
 
         context_messages = self._normalize_context(context)
-        combined_query = self._combine_query(normalized, context_messages, referential_tokens, min_len, max_turns)
+        combined_query = self._combine_query(
+            normalized, context_messages, self._referential_tokens, self._min_query_len, self._max_turns
+        )
 
         cached_answer = self.answer_cache.get(combined_query)
         if cached_answer:
-            return cached_answer
+            return normalized, combined_query, cached_answer, [], cached_answer.confidence
 
         candidates = self.retrieval_cache.get(combined_query)
         if candidates is None:
@@ -56,60 +183,46 @@ class ChatPipeline:
             self.retrieval_cache.set(combined_query, candidates)
 
         if not candidates:
-            return build_answer("", [], self.config.get("llm", {}).get("refuse_template", ""))
+            return normalized, combined_query, build_answer("", [], self._refuse_template), [], 0.0
 
-        weights = self.config.get("retrieval", {}).get("hybrid", {}).get("merge_weights", {})
         reranked = rerank(
             candidates,
-            weight_vector=weights.get("vector", 0.6),
-            weight_bm25=weights.get("bm25", 0.4),
-            intent_boost=self.config.get("rerank", {}).get("intent_boost", 0.0),
+            weight_vector=self._weight_vector,
+            weight_bm25=self._weight_bm25,
+            intent_boost=self._intent_boost,
         )
 
-        top_k = self.config.get("rerank", {}).get("top_k", 5)
-        reranked = reranked[:top_k]
+        reranked = reranked[: self._rerank_top_k]
 
-        gate_cfg = self.config.get("confidence_gate", {})
         passed, confidence = passes_confidence_gate(
             reranked,
-            min_confidence=gate_cfg.get("min_confidence", 0.55),
-            min_margin=gate_cfg.get("min_margin", 0.05),
-            conflict_reject=gate_cfg.get("conflict_reject", True),
+            min_confidence=self._min_confidence,
+            min_margin=self._min_margin,
+            conflict_reject=self._conflict_reject,
         )
         if not passed:
-            return build_answer("", [], self.config.get("llm", {}).get("refuse_template", ""))
+            return normalized, combined_query, build_answer("", [], self._refuse_template), [], confidence
 
+        return normalized, combined_query, None, reranked, confidence
+
+    def _ensure_llm(self) -> None:
+        if self._llm is not None:
+            return
         llm_cfg = self.config.get("llm", {})
-        provider = (llm_cfg.get("provider") or "").lower()
-        if provider in {"qwen_local", "qwen-local"}:
-            response = self._respond_with_llm(normalized, reranked, confidence)
-            self.answer_cache.set(combined_query, response)
-            return response
+        from .llm import LocalQwenLLM
 
-        response = build_answer(normalized, reranked, self.config.get("llm", {}).get("refuse_template", ""))
-        response.confidence = confidence
-        self.answer_cache.set(combined_query, response)
-        return response
+        self._llm = LocalQwenLLM(
+            model_id=llm_cfg.get("model") or "Qwen/Qwen2.5-7B-Instruct",
+            quantization=llm_cfg.get("quantization", "int4"),
+            max_new_tokens=llm_cfg.get("max_output_tokens", 256),
+            temperature=llm_cfg.get("temperature", 0.2),
+            top_p=llm_cfg.get("top_p", 0.9),
+        )
 
     def _respond_with_llm(self, query: str, reranked: List[RetrievalCandidate], confidence: float) -> AnswerPayload:
         llm_cfg = self.config.get("llm", {})
-        model_id = llm_cfg.get("model") or "Qwen/Qwen2.5-7B-Instruct"
-        quantization = llm_cfg.get("quantization", "int4")
-        max_tokens = llm_cfg.get("max_output_tokens", 256)
-        temperature = llm_cfg.get("temperature", 0.2)
-        top_p = llm_cfg.get("top_p", 0.9)
         system_prompt = llm_cfg.get("system_prompt", "")
-
-        if self._llm is None:
-            from .llm import LocalQwenLLM
-
-            self._llm = LocalQwenLLM(
-                model_id=model_id,
-                quantization=quantization,
-                max_new_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-            )
+        self._ensure_llm()
         prompt = build_llm_prompt(query, reranked)
         answer_text = self._llm.generate(system_prompt, prompt)
         if not answer_text:
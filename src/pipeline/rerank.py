@@ -1,4 +1,6 @@
-from typing import List, Tuple
+from typing import List
+
+import numpy as np
 
 from .types import RetrievalCandidate
 
@@ -12,11 +14,19 @@ def rerank(
     if not candidates:
         return []
 
-    max_bm25 = max(c.scores.get("bm25", 0.0) for c in candidates) or 1.0
-    for cand in candidates:
-        bm25_norm = cand.scores.get("bm25", 0.0) / max_bm25
-        vector_score = cand.scores.get("vector", 0.0)
-        intent_score = intent_boost if cand.intent else 0.0
-        cand.scores["final"] = weight_vector * vector_score + weight_bm25 * bm25_norm + intent_score
+    n = len(candidates)
+    bm25 = np.fromiter((c.bm25 for c in candidates), dtype=np.float32, count=n)
+    vector = np.fromiter((c.vector for c in candidates), dtype=np.float32, count=n)
+    intent = np.fromiter((intent_boost if c.intent else 0.0 for c in candidates), dtype=np.float32, count=n)
+
+    # match the scalar baseline: normalize by the actual max, falling back
+    # to 1.0 only when the whole column is zero
+    final = weight_vector * vector + weight_bm25 * (bm25 / (float(bm25.max()) or 1.0)) + intent
+    order = np.argsort(-final)
 
-    return sorted(candidates, key=lambda c: c.scores.get("final", 0.0), reverse=True)
+    ranked: List[RetrievalCandidate] = []
+    for idx in order:
+        cand = candidates[idx]
+        cand.final = float(final[idx])
+        ranked.append(cand)
+    return ranked
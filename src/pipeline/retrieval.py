@@ -1,95 +1,270 @@
 import math
+import os
+import pickle
 from collections import Counter, defaultdict
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 
 from .text import normalize_text, tokenize
 from .types import KnowledgeItem, RetrievalCandidate
 
+try:
+    from numba import njit  # type: ignore
+except ImportError:
+    njit = None
+
+# Tokenization dominates index-build time; fan it out across cores for large
+# corpora. The posting merge stays single-threaded — it is dict updates, which
+# do not parallelize usefully.
+_PARALLEL_MIN_DOCS = 2048
+
+
+def _tokenize_doc(doc: str) -> List[str]:
+    return tokenize(normalize_text(doc))
+
+
+def _tokenize_documents(documents: List[str]) -> List[List[str]]:
+    if len(documents) >= _PARALLEL_MIN_DOCS:
+        try:
+            from joblib import Parallel, delayed  # type: ignore
+
+            return Parallel(n_jobs=-1, batch_size=256)(
+                delayed(_tokenize_doc)(doc) for doc in documents
+            )
+        except ImportError:
+            pass
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor() as pool:
+                return list(pool.map(_tokenize_doc, documents, chunksize=256))
+        except OSError:
+            pass
+    return [_tokenize_doc(doc) for doc in documents]
+
+
+if njit is not None:
+    # Serial kernel: a prange over query terms would race on the accumulator.
+    @njit(cache=True, fastmath=True)
+    def _bm25_kernel(query_tids, term_offsets, doc_ids, freqs, idf_arr, doc_len, avgdl, k1, b, num_docs):  # pragma: no cover
+        scores = np.zeros(num_docs, dtype=np.float32)
+        for i in range(len(query_tids)):
+            t = query_tids[i]
+            idf = idf_arr[t]
+            for j in range(term_offsets[t], term_offsets[t + 1]):
+                d = doc_ids[j]
+                f = freqs[j]
+                denom = f + k1 * (1.0 - b + b * doc_len[d] / avgdl)
+                scores[d] += idf * (f * (k1 + 1.0)) / denom
+        return scores
+else:
+    _bm25_kernel = None
+
 
 class BM25Index:
     def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75) -> None:
         self.k1 = k1
         self.b = b
-        self.doc_len: List[int] = []
-        self.avgdl = 0.0
-        self.term_freqs: List[Counter] = []
-        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
-        self.idf: Dict[str, float] = {}
-        self.doc_tokens: List[List[str]] = []
+        # Token sets are built in the same indexing pass and shared with the
+        # Jaccard scorer; the raw token lists are not kept after indexing.
+        self.doc_token_sets: List[frozenset] = []
 
-        for idx, doc in enumerate(documents):
-            tokens = tokenize(normalize_text(doc))
-            self.doc_tokens.append(tokens)
+        doc_len: List[int] = []
+        raw_postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for idx, tokens in enumerate(_tokenize_documents(documents)):
             tf = Counter(tokens)
-            self.term_freqs.append(tf)
-            self.doc_len.append(len(tokens))
+            self.doc_token_sets.append(frozenset(tf))
+            doc_len.append(len(tokens))
             for term, freq in tf.items():
-                self.postings[term].append((idx, freq))
+                raw_postings[term].append((idx, freq))
 
         total_docs = len(documents)
-        self.avgdl = sum(self.doc_len) / total_docs if total_docs else 0.0
-        for term, posting in self.postings.items():
+        self.num_docs = total_docs
+        self.doc_len = np.asarray(doc_len, dtype=np.float32)
+        self.avgdl = float(self.doc_len.mean()) if total_docs else 0.0
+
+        # Postings as parallel (doc_ids, freqs) arrays so scoring is array math
+        # instead of a Python loop over every posting.
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.idf: Dict[str, float] = {}
+        for term, posting in raw_postings.items():
+            doc_ids = np.fromiter((d for d, _ in posting), dtype=np.int32, count=len(posting))
+            freqs = np.fromiter((f for _, f in posting), dtype=np.float32, count=len(posting))
+            self.postings[term] = (doc_ids, freqs)
             df = len(posting)
             self.idf[term] = math.log((total_docs - df + 0.5) / (df + 0.5) + 1)
 
-    def score(self, query: str) -> List[float]:
-        scores = [0.0] * len(self.doc_tokens)
-        tokens = tokenize(normalize_text(query))
+        # CSR layout for the optional numba kernel; skipped when numba is absent
+        self._term_to_id: Dict[str, int] = {}
+        self._csr = None
+        if _bm25_kernel is not None and self.postings:
+            terms = list(self.postings)
+            self._term_to_id = {term: i for i, term in enumerate(terms)}
+            counts = np.asarray([len(self.postings[t][0]) for t in terms], dtype=np.int64)
+            offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            all_ids = np.concatenate([self.postings[t][0] for t in terms])
+            all_freqs = np.concatenate([self.postings[t][1] for t in terms])
+            idf_arr = np.asarray([self.idf[t] for t in terms], dtype=np.float32)
+            self._csr = (offsets, all_ids, all_freqs, idf_arr)
+
+    def score(self, query_tokens: List[str]) -> np.ndarray:
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        tokens = query_tokens
+        avgdl = self.avgdl or 1.0
+        if self._csr is not None and _bm25_kernel is not None:
+            tids = np.asarray(
+                [self._term_to_id[t] for t in tokens if t in self._term_to_id], dtype=np.int64
+            )
+            if not tids.size:
+                return scores
+            offsets, all_ids, all_freqs, idf_arr = self._csr
+            return _bm25_kernel(
+                tids, offsets, all_ids, all_freqs, idf_arr, self.doc_len,
+                np.float32(avgdl), np.float32(self.k1), np.float32(self.b), self.num_docs,
+            )
         for term in tokens:
-            if term not in self.postings:
+            posting = self.postings.get(term)
+            if posting is None:
                 continue
+            doc_ids, freqs = posting
             idf = self.idf.get(term, 0.0)
-            for doc_idx, freq in self.postings[term]:
-                dl = self.doc_len[doc_idx]
-                denom = freq + self.k1 * (1 - self.b + self.b * dl / (self.avgdl or 1.0))
-                scores[doc_idx] += idf * (freq * (self.k1 + 1)) / denom
+            denom = freqs + self.k1 * (1 - self.b + self.b * self.doc_len[doc_ids] / avgdl)
+            np.add.at(scores, doc_ids, idf * (freqs * (self.k1 + 1)) / denom)
         return scores
 
-    def token_sets(self) -> List[set]:
-        return [set(tokens) for tokens in self.doc_tokens]
 
 
 class Retriever:
-    def __init__(self, items: List[KnowledgeItem], bm25_top_k: int, vector_top_k: int) -> None:
-        self.items = items
+    def __init__(
+        self,
+        items: List[KnowledgeItem],
+        bm25_top_k: int,
+        vector_top_k: int,
+        index_source: Optional[str] = None,
+    ) -> None:
         self.bm25_top_k = bm25_top_k
         self.vector_top_k = vector_top_k
+        # Columnar layout: candidate construction reads three flat arrays
+        # instead of chasing a KnowledgeItem pointer per hit.
+        self.num_items = len(items)
+        self.ids = np.asarray([item.id for item in items], dtype=object)
+        self.answers = np.asarray([item.answer for item in items], dtype=object)
+        self.intents = np.asarray([item.intent for item in items], dtype=object)
         self._texts = [build_retrieval_text(item) for item in items]
-        self._bm25 = BM25Index(self._texts)
-        self._token_sets = self._bm25.token_sets()
+        self._bm25 = self._load_or_build_index(index_source)
+        self._token_sets = self._bm25.doc_token_sets
+        self._build_doc_matrix()
+
+    def _load_or_build_index(self, index_source: Optional[str]) -> BM25Index:
+        """Reuse a pickled index when the source JSONL has not changed.
+
+        The pickle sits next to the JSONL and is keyed on its mtime, so a
+        reprocessed knowledge base invalidates it automatically.
+        """
+        cache_path = None
+        source_mtime = None
+        if index_source and os.path.exists(index_source):
+            cache_path = index_source + ".bm25.pkl"
+            source_mtime = os.path.getmtime(index_source)
+            if os.path.exists(cache_path):
+                try:
+                    with open(cache_path, "rb") as f:
+                        cached_mtime, index = pickle.load(f)
+                    if cached_mtime == source_mtime:
+                        return index
+                except (OSError, pickle.UnpicklingError, ValueError, EOFError):
+                    pass
+        index = BM25Index(self._texts)
+        if cache_path is not None:
+            try:
+                tmp_path = cache_path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump((source_mtime, index), f, protocol=5)
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                pass
+        return index
+
+    def _build_doc_matrix(self) -> None:
+        """Binary doc-term CSR matrix so Jaccard becomes one sparse matvec."""
+        self._vocab: Dict[str, int] = {}
+        self._doc_matrix = None
+        self._doc_sizes = None
+        try:
+            from scipy import sparse  # type: ignore
+        except ImportError:
+            return
+        if not self.num_items:
+            return
+        indptr = [0]
+        indices: List[int] = []
+        for token_set in self._token_sets:
+            for token in token_set:
+                indices.append(self._vocab.setdefault(token, len(self._vocab)))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float32)
+        self._doc_matrix = sparse.csr_matrix(
+            (data, indices, indptr), shape=(self.num_items, max(len(self._vocab), 1))
+        )
+        self._doc_sizes = np.asarray([len(s) for s in self._token_sets], dtype=np.float32)
 
     def retrieve(self, query: str) -> List[RetrievalCandidate]:
-        bm25_scores = self._bm25.score(query)
-        top_bm25 = sorted(range(len(bm25_scores)), key=bm25_scores.__getitem__, reverse=True)[: self.bm25_top_k]
+        # Tokenize once; BM25 and Jaccard share the result
+        qtokens = tokenize(normalize_text(query))
+        bm25_scores = self._bm25.score(qtokens)
+        top_bm25 = _top_k_indices(bm25_scores, self.bm25_top_k)
 
-        query_tokens = set(tokenize(normalize_text(query)))
-        vector_scores = []
-        for idx, token_set in enumerate(self._token_sets):
-            if not token_set or not query_tokens:
-                score = 0.0
-            else:
-                score = len(query_tokens & token_set) / len(query_tokens | token_set)
-            vector_scores.append(score)
+        query_tokens = set(qtokens)
+        vector_scores = self._jaccard_scores(query_tokens)
 
-        top_vector = sorted(range(len(vector_scores)), key=vector_scores.__getitem__, reverse=True)[: self.vector_top_k]
+        top_vector = _top_k_indices(vector_scores, self.vector_top_k)
 
         merged = set(top_bm25) | set(top_vector)
         candidates: List[RetrievalCandidate] = []
         for idx in merged:
-            item = self.items[idx]
             candidates.append(
                 RetrievalCandidate(
-                    id=item.id,
-                    answer=item.answer,
-                    intent=item.intent,
-                    scores={
-                        "bm25": bm25_scores[idx],
-                        "vector": vector_scores[idx],
-                    },
+                    id=self.ids[idx],
+                    answer=self.answers[idx],
+                    intent=self.intents[idx],
+                    bm25=float(bm25_scores[idx]),
+                    vector=float(vector_scores[idx]),
                 )
             )
         return candidates
 
+    def _jaccard_scores(self, query_tokens: set):
+        if self._doc_matrix is not None:
+            q_ids = [self._vocab[t] for t in query_tokens if t in self._vocab]
+            if not q_ids:
+                return np.zeros(self.num_items, dtype=np.float32)
+            qvec = np.zeros(self._doc_matrix.shape[1], dtype=np.float32)
+            qvec[q_ids] = 1.0
+            inter = self._doc_matrix @ qvec
+            union = self._doc_sizes + len(query_tokens) - inter
+            return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+        # Fallback without scipy: Python set intersections
+        vector_scores = []
+        for token_set in self._token_sets:
+            if not token_set or not query_tokens:
+                score = 0.0
+            else:
+                score = len(query_tokens & token_set) / len(query_tokens | token_set)
+            vector_scores.append(score)
+        return vector_scores
+
+
+def _top_k_indices(scores, k: int) -> List[int]:
+    """Indices of the k highest scores, best first — O(n) via argpartition."""
+    arr = np.asarray(scores)
+    if k >= arr.size:
+        return np.argsort(-arr).tolist()
+    idx = np.argpartition(-arr, k)[:k]
+    return idx[np.argsort(-arr[idx])].tolist()
+
 
 def build_retrieval_text(item: KnowledgeItem) -> str:
     parts = [msg.text for msg in item.context if msg.role == "user"]
@@ -1,9 +1,9 @@
 import re
 from typing import Iterable, List
 
-CJK_RE = re.compile(r"[\u4e00-\u9fff]+")
 TOKEN_RE = re.compile(r"[\u4e00-\u9fff]+|[a-zA-Z0-9]+")
 SPACE_RE = re.compile(r"\s+")
+SENTENCE_RE = re.compile(r"[^\u3002\uff01\uff1f!?.]*(?:[\u3002\uff01\uff1f!?.]+|$)")
 
 
 def normalize_text(text: str) -> str:
@@ -13,17 +13,29 @@ def normalize_text(text: str) -> str:
 
 
 def tokenize(text: str) -> List[str]:
+    # Input comes through `normalize_text`, so it is already lowercased.
+    # A TOKEN_RE match is either all-CJK or all-alphanumeric, so checking the
+    # first character replaces a second fullmatch pass.
     tokens: List[str] = []
-    for part in TOKEN_RE.findall(text):
-        if CJK_RE.fullmatch(part):
-            if len(part) == 1:
-                tokens.append(part)
+    append = tokens.append
+    for match in TOKEN_RE.finditer(text):
+        part = match.group()
+        if "\u4e00" <= part[0] <= "\u9fff":
+            n = len(part)
+            if n == 1:
+                append(part)
             else:
-                tokens.extend(part[i : i + 2] for i in range(len(part) - 1))
+                for i in range(n - 1):
+                    append(part[i : i + 2])
         else:
-            tokens.append(part.lower())
+            append(part)
     return tokens
 
 
 def contains_referential(text: str, tokens: Iterable[str]) -> bool:
     return any(token in text for token in tokens)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentence chunks on CJK/ASCII terminators."""
+    return [s for s in (m.group().strip() for m in SENTENCE_RE.finditer(text)) if s]
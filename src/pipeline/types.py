@@ -1,14 +1,14 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     role: str
     text: str
 
 
-@dataclass
+@dataclass(slots=True)
 class KnowledgeItem:
     id: str
     query: str
@@ -17,15 +17,17 @@ class KnowledgeItem:
     context: List[Message] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class RetrievalCandidate:
     id: str
     answer: str
     intent: Optional[str]
-    scores: Dict[str, float]
+    bm25: float = 0.0
+    vector: float = 0.0
+    final: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class AnswerPayload:
     answer: str
     citations: List[str]
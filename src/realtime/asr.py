@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
@@ -22,9 +23,14 @@ class WhisperASR:
     ) -> None:
         self.model_name = model_name or os.environ.get("ASR_MODEL", "small")
         self.device = device or os.environ.get("ASR_DEVICE", "auto")
-        self.compute_type = compute_type or os.environ.get("ASR_COMPUTE", "float16")
+        # int8 weights are 3-4x faster than float16 under CTranslate2 with
+        # negligible WER cost; keep float16 activations except on pure CPU.
+        default_compute = "int8" if self.device == "cpu" else "int8_float16"
+        self.compute_type = compute_type or os.environ.get("ASR_COMPUTE", default_compute)
         self.language = language or os.environ.get("ASR_LANG")
+        self.beam_size = int(os.environ.get("ASR_BEAM", "1"))
         self._model = None  # lazy
+        self._batched = None
 
     def _ensure_model(self):
         if self._model is not None:
@@ -32,6 +38,12 @@ class WhisperASR:
         from faster_whisper import WhisperModel  # type: ignore
 
         self._model = WhisperModel(self.model_name, device=self.device, compute_type=self.compute_type)
+        try:
+            from faster_whisper import BatchedInferencePipeline  # type: ignore
+
+            self._batched = BatchedInferencePipeline(model=self._model)
+        except ImportError:
+            self._batched = None
 
     def transcribe_bytes(self, audio_bytes: bytes, sample_rate: int = 16000) -> str:
         if not audio_bytes:
@@ -41,13 +53,115 @@ class WhisperASR:
         audio = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
         # faster-whisper expects 16kHz
         # If sample_rate != 16000, the client should resample before sending.
-        segments, info = self._model.transcribe(
+        return self._decode(audio)
+
+    def transcribe_batch(self, audio_batch: List[bytes]) -> List[str]:
+        """Transcribe several utterances; used by AsrBatcher.
+
+        CTranslate2 batches segments within each utterance via the batched
+        pipeline; utterances themselves are decoded back to back on the
+        already-warm model.
+        """
+        if not audio_batch:
+            return []
+        self._ensure_model()
+        results: List[str] = []
+        for audio_bytes in audio_batch:
+            if not audio_bytes:
+                results.append("")
+                continue
+            audio = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+            results.append(self._decode(audio))
+        return results
+
+    def _decode(self, audio: np.ndarray) -> str:
+        model = self._batched if self._batched is not None else self._model
+        segments, info = model.transcribe(
             audio,
             language=self.language,
             vad_filter=True,
-            beam_size=1,
+            beam_size=self.beam_size,
             condition_on_previous_text=False,
         )
         texts = [seg.text.strip() for seg in segments]
         return " ".join(t for t in texts if t)
 
+
+
+class AsrBatcher:
+    """Batches concurrent transcription requests into single model calls.
+
+    Endpoints submit audio and await a future; a background worker drains
+    the queue (up to `max_batch` items or `max_wait` seconds), groups items
+    into duration buckets so short clips are not padded to the longest one,
+    and fans the transcripts back out. Start/stop from the app lifespan.
+    """
+
+    def __init__(self, asr: WhisperASR, max_batch: int = 8, max_wait: float = 0.05) -> None:
+        self._asr = asr
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: "asyncio.Queue[Tuple[bytes, asyncio.Future]]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def submit(self, audio_bytes: bytes) -> str:
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((audio_bytes, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            audios = [audio for audio, _ in batch]
+            try:
+                texts = await asyncio.to_thread(self._transcribe_all, audios)
+            except Exception as exc:  # propagate to every waiter, keep worker alive
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), text in zip(batch, texts):
+                if not future.done():
+                    future.set_result(text)
+
+    def _transcribe_all(self, audios: List[bytes]) -> List[str]:
+        results = [""] * len(audios)
+        # Bucket by duration (<10s, 10-30s, >30s) so padding inside a batch
+        # call stays bounded.
+        buckets: Dict[int, List[int]] = {}
+        for idx, audio in enumerate(audios):
+            seconds = len(audio) / 32000.0  # PCM16 @ 16kHz
+            bucket = 0 if seconds < 10 else (1 if seconds <= 30 else 2)
+            buckets.setdefault(bucket, []).append(idx)
+        batch_fn = getattr(self._asr, "transcribe_batch", None)
+        for indices in buckets.values():
+            if batch_fn is not None:
+                texts = batch_fn([audios[i] for i in indices])
+            else:
+                texts = [self._asr.transcribe_bytes(audios[i]) for i in indices]
+            for i, text in zip(indices, texts):
+                results[i] = text
+        return results
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """Embedding-keyed response cache for paraphrased repeat queries.
+
+    Stores L2-normalized query embeddings in a fixed float32 ring buffer and
+    returns the cached response when the best cosine similarity clears the
+    threshold, turning a full pipeline call into one matrix-vector product.
+    Lazily loads the sentence-transformers encoder; if it is not installed the
+    cache disables itself and `get_or_compute` degrades to a plain call.
+    """
+
+    # Weight of the query embedding vs the conversation embedding in lookups
+    context_alpha = 0.7
+    # Random-projection LSH shape: num_tables signatures of num_bits each
+    num_tables = 8
+    num_bits = 16
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        threshold: float = 0.87,
+        max_entries: int = 1024,
+    ) -> None:
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._model = None  # lazy
+        self._disabled = False
+        # float16 storage: half the bytes scanned per lookup; the LSH gather
+        # upcasts only the few candidate rows that get exact-scored
+        self._embeddings: Optional[np.ndarray] = None  # [max_entries, d] float16
+        self._responses: List[Any] = [None] * max_entries
+        self._count = 0
+        self._cursor = 0
+        # LSH buckets: per-table signature -> row indices; row signatures are
+        # kept so ring-buffer overwrites can unlink the stale entry.
+        self._projections: Optional[np.ndarray] = None  # [num_tables, num_bits, d]
+        self._tables: List[Dict[bytes, List[int]]] = [{} for _ in range(self.num_tables)]
+        self._row_signatures: List[Optional[List[bytes]]] = [None] * max_entries
+
+    def _ensure_model(self) -> bool:
+        if self._disabled:
+            return False
+        if self._model is not None:
+            return True
+        try:
+            from sentence_transformers import SentenceTransformer  # type: ignore
+        except Exception:
+            self._disabled = True
+            return False
+        self._model = SentenceTransformer(self.model_name)
+        try:
+            import torch  # type: ignore
+
+            if torch.cuda.is_available():
+                # FP16 halves the encoder's bandwidth with negligible
+                # cosine drift at this threshold
+                self._model = self._model.to("cuda").half()
+        except Exception:
+            pass
+        return True
+
+    def embed(self, text: str) -> Optional[np.ndarray]:
+        if not self._ensure_model():
+            return None
+        vec = self._model.encode(text, convert_to_numpy=True).astype(np.float32)
+        norm = float(np.linalg.norm(vec))
+        if norm > 0:
+            vec /= norm
+        return vec
+
+    def _signatures(self, vec: np.ndarray) -> List[bytes]:
+        if self._projections is None:
+            rng = np.random.default_rng(0)
+            self._projections = rng.standard_normal(
+                (self.num_tables, self.num_bits, vec.shape[0])
+            ).astype(np.float32)
+        bits = (self._projections @ vec) > 0  # [num_tables, num_bits]
+        packed = np.packbits(bits, axis=1)
+        return [row.tobytes() for row in packed]
+
+    def get(self, vec: np.ndarray) -> Optional[Any]:
+        if self._count == 0:
+            return None
+        # Exact cosine only over rows sharing at least one LSH bucket; the
+        # candidate set stays small as the cache grows, unlike a full scan.
+        candidates: set = set()
+        for table, sig in zip(self._tables, self._signatures(vec)):
+            rows = table.get(sig)
+            if rows:
+                candidates.update(rows)
+        if not candidates:
+            return None
+        rows_arr = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        sims = self._embeddings[rows_arr].astype(np.float32) @ vec
+        best = int(np.argmax(sims))
+        if float(sims[best]) >= self.threshold:
+            return self._responses[int(rows_arr[best])]
+        return None
+
+    def put(self, vec: np.ndarray, response: Any) -> None:
+        if self._embeddings is None:
+            self._embeddings = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float16)
+        row = self._cursor
+        # Ring buffer: once full, the oldest entry is overwritten — unlink its
+        # stale bucket references first.
+        old_sigs = self._row_signatures[row]
+        if old_sigs is not None:
+            for table, sig in zip(self._tables, old_sigs):
+                rows = table.get(sig)
+                if rows is not None:
+                    try:
+                        rows.remove(row)
+                    except ValueError:
+                        pass
+                    if not rows:
+                        del table[sig]
+        sigs = self._signatures(vec)
+        for table, sig in zip(self._tables, sigs):
+            table.setdefault(sig, []).append(row)
+        self._row_signatures[row] = sigs
+        self._embeddings[row] = vec
+        self._responses[row] = response
+        self._cursor = (row + 1) % self.max_entries
+        self._count = min(self._count + 1, self.max_entries)
+
+    def warm(self, entries: Iterable[Tuple[str, Any]]) -> None:
+        """Pre-populate from (query, response) pairs, e.g. FAQ head queries."""
+        for query, response in entries:
+            vec = self.embed(query)
+            if vec is not None:
+                self.put(vec, response)
+
+    def lookup(
+        self, query: str, ctx: Optional["RollingContextEmbedding"] = None
+    ) -> Tuple[Optional[np.ndarray], Optional[Any]]:
+        """Return (lookup_vector, cached_response); vector is None if disabled.
+
+        Callers that stream a fresh response should `put` it under the
+        returned vector once complete.
+        """
+        vec = self.embed(query)
+        if vec is None:
+            return None, None
+        # Blend in the conversation embedding so ambiguous follow-ups
+        # ("那这个呢？") don't mis-hit entries from unrelated conversations.
+        ctx_vec = ctx.vector if ctx is not None else None
+        if ctx_vec is not None:
+            vec = self.context_alpha * vec + (1.0 - self.context_alpha) * ctx_vec
+            norm = float(np.linalg.norm(vec))
+            if norm > 0:
+                vec /= norm
+        return vec, self.get(vec)
+
+    def get_or_compute(
+        self,
+        query: str,
+        compute: Callable[[], Any],
+        ctx: Optional["RollingContextEmbedding"] = None,
+    ) -> Any:
+        vec, cached = self.lookup(query, ctx=ctx)
+        if cached is not None:
+            return cached
+        response = compute()
+        if vec is not None:
+            self.put(vec, response)
+        return response
+
+
+class RollingContextEmbedding:
+    """Decayed mix of the last few user-turn embeddings for one connection.
+
+    Each turn embeds only the new message; the blend over the retained
+    window (newest weighted highest) is recomputed from at most `max_turns`
+    cached vectors. Yields None until the conversation has at least two
+    turns, so early queries fall back to query-only lookup.
+    """
+
+    def __init__(self, cache: SemanticCache, decay: float = 0.6, max_turns: int = 4) -> None:
+        self._cache = cache
+        self.decay = decay
+        self._vectors: deque = deque(maxlen=max_turns)
+
+    def update(self, text: str) -> None:
+        vec = self._cache.embed(text)
+        if vec is not None:
+            self._vectors.append(vec)
+
+    @property
+    def vector(self) -> Optional[np.ndarray]:
+        if len(self._vectors) < 2:
+            return None
+        blended = np.zeros_like(self._vectors[-1])
+        weight = 1.0
+        for vec in reversed(self._vectors):
+            blended += weight * vec
+            weight *= self.decay
+        norm = float(np.linalg.norm(blended))
+        if norm > 0:
+            blended /= norm
+        return blended
@@ -2,36 +2,98 @@ from __future__ import annotations
 
 import asyncio
 import json
-from dataclasses import asdict
-from typing import Any, AsyncIterator, Dict, List, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
 
 from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec  # type: ignore
+except ImportError:
+    msgspec = None
+
 from ..pipeline import ChatPipeline
 from ..pipeline.config import load_config
 from ..pipeline.loader import load_qa_pairs
-from ..pipeline.types import Message
-from .asr import WhisperASR
+from ..pipeline.text import split_sentences
+from ..pipeline.types import AnswerPayload, Message
+from .asr import AsrBatcher, WhisperASR
+from .semantic_cache import RollingContextEmbedding, SemanticCache
 from .tts import EdgeTTS
 
 
-class SimpleASR:
-    async def transcribe_stream(self, ws: WebSocket) -> AsyncIterator[str]:
-        # Placeholder: expect client to send already-transcribed text frames
-        while True:
-            data = await ws.receive_text()
-            yield data
+MAX_UTTERANCE_BYTES = 16000 * 2 * 60  # 60s of 16kHz PCM16
+MAX_CONCURRENT_INFERENCES = 4
+BUSY_ACQUIRE_TIMEOUT = 5.0
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+if msgspec is not None:
+    # Typed structs skip per-message dict construction; the partial-text
+    # struct is a single reused instance mutated per sentence (encode calls
+    # are synchronous, so reuse is safe on one event loop).
+    class _AnswerMsg(msgspec.Struct):
+        answer: str
+        citations: List[str]
+        confidence: float
+        fallback: bool
+
+    class _PartialMsg(msgspec.Struct):
+        type: str
+        text: str
+
+    _msg_encoder = msgspec.json.Encoder()
+    _partial_msg = _PartialMsg("partial", "")
 
+    def _encode_answer(response: AnswerPayload) -> bytes:
+        return _msg_encoder.encode(
+            _AnswerMsg(response.answer, response.citations, response.confidence, response.fallback)
+        )
 
-class SimpleTTS:
-    async def synthesize(self, text: str) -> bytes:
-        # Placeholder: return empty audio bytes; real impl can plug a TTS backend
-        return b""
+    def _encode_partial(text: str) -> bytes:
+        _partial_msg.text = text
+        return _msg_encoder.encode(_partial_msg)
+
+else:
+
+    def _encode_answer(response: AnswerPayload) -> bytes:
+        return _dumps({
+            "answer": response.answer,
+            "citations": response.citations,
+            "confidence": response.confidence,
+            "fallback": response.fallback,
+        })
+
+    def _encode_partial(text: str) -> bytes:
+        return _dumps({"type": "partial", "text": text})
 
 
 def create_app(config_path: str = "config/pipeline.json", data_path: Optional[str] = None) -> FastAPI:
-    app = FastAPI()
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Heavy state (knowledge base, BM25 index) loads at startup rather
+        # than at app construction and lives on app.state, so the process
+        # holds exactly one copy shared by every handler.
+        items = load_qa_pairs(src_path)
+        app.state.items = items
+        app.state.pipeline = ChatPipeline(cfg, items, index_source=src_path)
+        asr_batcher.start()
+        yield
+        await asr_batcher.stop()
+
+    app = FastAPI(lifespan=lifespan)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -41,39 +103,53 @@ def create_app(config_path: str = "config/pipeline.json", data_path: Optional[st
     )
 
     cfg = load_config(config_path)
+    # Sliding window on per-connection history: keeps respond() and prompt
+    # size bounded however long the session runs
+    max_session_turns = cfg.get("input", {}).get("context", {}).get("max_session_turns", 8)
     src_path = data_path or cfg.get("retrieval", {}).get("index_source", "data/qa_pairs.jsonl")
-    items = load_qa_pairs(src_path)
-    pipeline = ChatPipeline(cfg, items)
-    asr = SimpleASR()
-    tts = SimpleTTS()
     whisper_asr = WhisperASR()
+    asr_batcher = AsrBatcher(whisper_asr)
     edge_tts = EdgeTTS()
+    semantic_cache = SemanticCache()
+    inference_sem = asyncio.Semaphore(MAX_CONCURRENT_INFERENCES)
+    app.state.asr_batcher = asr_batcher
+    app.state.whisper_asr = whisper_asr
+    app.state.edge_tts = edge_tts
+    app.state.semantic_cache = semantic_cache
 
     @app.websocket("/ws")
     async def ws_chat(websocket: WebSocket) -> None:
         await websocket.accept()
+        pipeline: ChatPipeline = websocket.app.state.pipeline
         context: List[Message] = []
+        ctx_emb = RollingContextEmbedding(semantic_cache)
         try:
-            async for text in asr.transcribe_stream(websocket):
-                query = text.strip()
+            while True:
+                query = (await websocket.receive_text()).strip()
                 if not query:
                     continue
-                response = pipeline.respond(query, context)
-                # send json response (text); TTS bytes could be sent on another binary frame if desired
-                await websocket.send_text(json.dumps({
-                    "answer": response.answer,
-                    "citations": response.citations,
-                    "confidence": response.confidence,
-                    "fallback": response.fallback,
-                }, ensure_ascii=False))
+                # embedder and pipeline are synchronous and slow; keep both
+                # off the event loop
+                vec, cached = await asyncio.to_thread(semantic_cache.lookup, query, ctx_emb)
+                if cached is not None:
+                    response, envelope, _mp3 = cached
+                else:
+                    response = await asyncio.to_thread(pipeline.respond, query, context)
+                    envelope = _encode_answer(response)
+                    if vec is not None:
+                        semantic_cache.put(vec, (response, envelope, None))
+                # cache hits reuse the pre-serialized envelope as-is
+                await websocket.send_bytes(envelope)
                 context.append(Message(role="user", text=query))
                 context.append(Message(role="system", text=response.answer))
+                context[:] = context[-max_session_turns * 2 :]
+                await asyncio.to_thread(ctx_emb.update, query)
         except WebSocketDisconnect:
             return
 
     @app.get("/health")
-    async def health() -> Dict[str, Any]:
-        return {"status": "ok", "items": len(items)}
+    async def health(request: Request) -> Dict[str, Any]:
+        return {"status": "ok", "items": len(request.app.state.items)}
 
     @app.websocket("/ws/rt")
     async def ws_realtime(websocket: WebSocket) -> None:
@@ -86,14 +162,166 @@ def create_app(config_path: str = "config/pipeline.json", data_path: Optional[st
           - Outgoing: text JSON answer; binary audio frames with synthesized TTS
         """
         await websocket.accept()
+        pipeline: ChatPipeline = websocket.app.state.pipeline
         context: List[Message] = []
-        audio_buf = bytearray()
+        ctx_emb = RollingContextEmbedding(semantic_cache)
+        # Incremental ASR: completed ~2s segments are transcribed while the
+        # user is still speaking, so flush only decodes the final tail.
+        segment_bytes = 32000 * 2  # 2s @ 16kHz PCM16
+        segment_chunks: List[bytes] = []
+        segment_len = 0
+        utterance_len = 0
+        overflow_warned = False
+        partials: List[str] = []
+        pending_asr: Optional[asyncio.Task] = None
+
+        async def _transcribe_segment(segment: bytes) -> None:
+            text = await asr_batcher.submit(segment)
+            if text:
+                partials.append(text)
+                # Speculative prewarm: the partial hypothesis is usually a
+                # close paraphrase of the final transcript, so retrieval and
+                # the cache embedder can warm up before flush arrives.
+                hypothesis = " ".join(partials)
+                await asyncio.to_thread(pipeline.prewarm, hypothesis, context)
+                await asyncio.to_thread(semantic_cache.lookup, hypothesis, ctx_emb)
+
+        async def _fetch_tts(sentence: str, queue: "asyncio.Queue") -> None:
+            # The sentinel must go out even when the remote TTS stream dies
+            # mid-iteration, or _send_head blocks on the queue forever; the
+            # `await task` there re-raises the real error.
+            try:
+                async for chunk in edge_tts.stream(sentence):
+                    await queue.put(chunk)
+            finally:
+                await queue.put(None)
+
+        async def _stream_parts(query: str):
+            # Run the synchronous respond_stream generator on a worker thread
+            # so LLM decoding never blocks the event loop; sentences arrive
+            # through a queue and the TTS prefetch tasks run in between.
+            loop = asyncio.get_running_loop()
+            parts_q: "asyncio.Queue" = asyncio.Queue()
+            done = object()
+
+            def _produce() -> None:
+                try:
+                    for part in pipeline.respond_stream(query, context):
+                        loop.call_soon_threadsafe(parts_q.put_nowait, part)
+                finally:
+                    loop.call_soon_threadsafe(parts_q.put_nowait, done)
+
+            producer = asyncio.create_task(asyncio.to_thread(_produce))
+            try:
+                while True:
+                    part = await parts_q.get()
+                    if part is done:
+                        break
+                    yield part
+            finally:
+                await producer
+
+        async def _iter_parts(items: List[Any]):
+            for item in items:
+                yield item
+
+        async def _send_head(pending: deque, audio_parts: List[bytes]) -> None:
+            sentence, queue, task = pending.popleft()
+            await websocket.send_text(_encode_partial(sentence).decode("utf-8"))
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                audio_parts.append(chunk)
+                await websocket.send_bytes(chunk)
+            await task
+
+        async def _answer_query(query: str) -> None:
+            try:
+                await asyncio.wait_for(inference_sem.acquire(), timeout=BUSY_ACQUIRE_TIMEOUT)
+            except asyncio.TimeoutError:
+                await websocket.send_text(json.dumps({"error": "busy", "retry_ms": 2000}))
+                # still a complete turn from the client's perspective
+                await websocket.send_text(json.dumps({"type": "audio_end"}))
+                return
+            try:
+                await _answer_query_locked(query)
+            finally:
+                inference_sem.release()
+
+        async def _answer_query_locked(query: str) -> None:
+            # Stream sentence-by-sentence: each sentence goes out as a
+            # partial text frame followed by its TTS audio, so the first
+            # audio reaches the client while the LLM is still generating.
+            # Up to three sentences synthesize concurrently; the deque keeps
+            # the audio ordered, so later round trips hide behind playback.
+            vec, cached = await asyncio.to_thread(semantic_cache.lookup, query, ctx_emb)
+            envelope = None
+            if cached is not None:
+                response, envelope, mp3 = cached
+                if mp3:
+                    # full fast path: answer envelope plus the stored MP3,
+                    # re-chunked for progressive playback — no TTS round trip
+                    await websocket.send_text(envelope.decode("utf-8"))
+                    for i in range(0, len(mp3), 16384):
+                        await websocket.send_bytes(mp3[i : i + 16384])
+                    await websocket.send_text(json.dumps({"type": "audio_end"}))
+                    context.append(Message(role="user", text=query))
+                    context.append(Message(role="system", text=response.answer))
+                    context[:] = context[-max_session_turns * 2 :]
+                    await asyncio.to_thread(ctx_emb.update, query)
+                    return
+                parts = _iter_parts(split_sentences(response.answer) + [response])
+            else:
+                parts = _stream_parts(query)
+            response = None
+            pending: deque = deque()
+            audio_parts: List[bytes] = []
+            async for part in parts:
+                if isinstance(part, AnswerPayload):
+                    response = part
+                    break
+                queue: "asyncio.Queue" = asyncio.Queue()
+                pending.append((part, queue, asyncio.create_task(_fetch_tts(part, queue))))
+                if len(pending) >= 3:
+                    await _send_head(pending, audio_parts)
+            while pending:
+                await _send_head(pending, audio_parts)
+            if response is None:
+                return
+            if envelope is None:
+                envelope = _encode_answer(response)
+            # binary frames carry audio on this protocol, so JSON envelopes
+            # go out as text even though orjson produced bytes
+            await websocket.send_text(envelope.decode("utf-8"))
+            await websocket.send_text(json.dumps({"type": "audio_end"}))
+            if vec is not None and cached is None:
+                semantic_cache.put(vec, (response, envelope, b"".join(audio_parts)))
+            context.append(Message(role="user", text=query))
+            context.append(Message(role="system", text=response.answer))
+            context[:] = context[-max_session_turns * 2 :]
+            await asyncio.to_thread(ctx_emb.update, query)
+
         try:
             while True:
                 msg = await websocket.receive()
                 if "bytes" in msg and msg["bytes"] is not None:
-                    audio_buf.extend(msg["bytes"])
-                    # keep collecting until flush
+                    if utterance_len >= MAX_UTTERANCE_BYTES:
+                        # drop audio beyond the cap; the client must flush
+                        if not overflow_warned:
+                            overflow_warned = True
+                            await websocket.send_text(json.dumps(
+                                {"warning": "max utterance length"}, ensure_ascii=False
+                            ))
+                        continue
+                    segment_chunks.append(msg["bytes"])
+                    segment_len += len(msg["bytes"])
+                    utterance_len += len(msg["bytes"])
+                    if segment_len >= segment_bytes and (pending_asr is None or pending_asr.done()):
+                        segment = b"".join(segment_chunks)
+                        segment_chunks.clear()
+                        segment_len = 0
+                        pending_asr = asyncio.create_task(_transcribe_segment(segment))
                     continue
                 if "text" in msg and msg["text"] is not None:
                     try:
@@ -102,41 +330,34 @@ def create_app(config_path: str = "config/pipeline.json", data_path: Optional[st
                         payload = {"type": "text", "text": msg["text"]}
 
                     if payload.get("type") == "flush":
-                        text = whisper_asr.transcribe_bytes(bytes(audio_buf)) if audio_buf else (payload.get("text", "") or "")
-                        audio_buf.clear()
+                        utterance_len = 0
+                        overflow_warned = False
+                        if pending_asr is not None:
+                            await pending_asr
+                            pending_asr = None
+                        if segment_chunks:
+                            tail = b"".join(segment_chunks)
+                            segment_chunks.clear()
+                            segment_len = 0
+                            await _transcribe_segment(tail)
+                        if partials:
+                            text = " ".join(partials)
+                            partials.clear()
+                        else:
+                            text = payload.get("text", "") or ""
                         query = (text or "").strip()
                         if not query:
                             await websocket.send_text(json.dumps({"warning": "no speech or text"}, ensure_ascii=False))
+                            await websocket.send_text(json.dumps({"type": "audio_end"}))
                             continue
-                        response = pipeline.respond(query, context)
-                        await websocket.send_text(json.dumps({
-                            "answer": response.answer,
-                            "citations": response.citations,
-                            "confidence": response.confidence,
-                            "fallback": response.fallback,
-                        }, ensure_ascii=False))
-                        # stream TTS back
-                        async for audio in edge_tts.stream(response.answer):
-                            await websocket.send_bytes(audio)
-                        context.append(Message(role="user", text=query))
-                        context.append(Message(role="system", text=response.answer))
+                        await _answer_query(query)
                         continue
                     # If plain text query, treat as already transcribed
                     if payload.get("type") == "text":
                         query = (payload.get("text") or "").strip()
                         if not query:
                             continue
-                        response = pipeline.respond(query, context)
-                        await websocket.send_text(json.dumps({
-                            "answer": response.answer,
-                            "citations": response.citations,
-                            "confidence": response.confidence,
-                            "fallback": response.fallback,
-                        }, ensure_ascii=False))
-                        async for audio in edge_tts.stream(response.answer):
-                            await websocket.send_bytes(audio)
-                        context.append(Message(role="user", text=query))
-                        context.append(Message(role="system", text=response.answer))
+                        await _answer_query(query)
                         continue
         except WebSocketDisconnect:
             return
@@ -147,18 +368,41 @@ def create_app(config_path: str = "config/pipeline.json", data_path: Optional[st
         - Client sends full audio (PCM16LE 16kHz mono) as HTTP body.
         - Server transcribes, calls pipeline, and returns TTS audio (MP3).
         """
-        audio_bytes = await request.body()
-        if not audio_bytes:
-            return Response(content=b"", media_type="audio/mpeg", status_code=400)
-        text = whisper_asr.transcribe_bytes(audio_bytes)
-        query = (text or "").strip()
-        if not query:
-            return Response(content=b"", media_type="audio/mpeg", status_code=400)
-        response = pipeline.respond(query, [])
-        mp3_chunks: List[bytes] = []
-        async for audio in edge_tts.stream(response.answer):
-            mp3_chunks.append(audio)
-        return Response(content=b"".join(mp3_chunks), media_type="audio/mpeg")
+        pipeline: ChatPipeline = request.app.state.pipeline
+        try:
+            await asyncio.wait_for(inference_sem.acquire(), timeout=BUSY_ACQUIRE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return Response(
+                content=b'{"error": "busy", "retry_ms": 2000}',
+                media_type="application/json",
+                status_code=503,
+            )
+        try:
+            audio_bytes = await request.body()
+            if not audio_bytes:
+                return Response(content=b"", media_type="audio/mpeg", status_code=400)
+            text = await asr_batcher.submit(audio_bytes)
+            query = (text or "").strip()
+            if not query:
+                return Response(content=b"", media_type="audio/mpeg", status_code=400)
+            # same (response, envelope, mp3) entry shape as the ws endpoints,
+            # so cross-endpoint hits unpack cleanly and reuse stored audio
+            vec, cached = await asyncio.to_thread(semantic_cache.lookup, query)
+            if cached is not None:
+                response, _envelope, mp3 = cached
+                if mp3:
+                    return Response(content=mp3, media_type="audio/mpeg")
+            else:
+                response = await asyncio.to_thread(pipeline.respond, query, [])
+            mp3_chunks: List[bytes] = []
+            async for audio in edge_tts.stream(response.answer):
+                mp3_chunks.append(audio)
+            mp3 = b"".join(mp3_chunks)
+            if vec is not None and cached is None:
+                semantic_cache.put(vec, (response, _encode_answer(response), mp3))
+            return Response(content=mp3, media_type="audio/mpeg")
+        finally:
+            inference_sem.release()
 
     return app
 
@@ -166,4 +410,19 @@ def create_app(config_path: str = "config/pipeline.json", data_path: Optional[st
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(create_app(), host="0.0.0.0", port=9000)
+    # Prefer the C event loop / parser when installed; both shave per-frame
+    # overhead on the many small websocket messages this server sends.
+    try:
+        import uvloop  # type: ignore # noqa: F401
+
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    try:
+        import httptools  # type: ignore # noqa: F401
+
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+
+    uvicorn.run(create_app(), host="0.0.0.0", port=9000, loop=loop, http=http, ws="websockets")
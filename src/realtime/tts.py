@@ -1,28 +1,48 @@
 from __future__ import annotations
 
-import asyncio
+import hashlib
+from collections import OrderedDict
 from typing import AsyncIterator, Optional
 
 
 class EdgeTTS:
     """Thin wrapper over edge-tts to stream TTS audio.
 
-    Produces MP3 bytes; clients can play progressively.
+    Produces MP3 bytes; clients can play progressively. Synthesized audio is
+    kept in a small LRU cache keyed on (voice, text digest), so repeated
+    sentences — refusal templates, greetings, cached answers — skip the
+    network round trip entirely.
     """
 
-    def __init__(self, voice: Optional[str] = None) -> None:
+    def __init__(self, voice: Optional[str] = None, cache_size: int = 512) -> None:
         self.voice = voice or "zh-CN-XiaoxiaoNeural"
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+
+    def _cache_key(self, text: str) -> tuple:
+        return (self.voice, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest())
 
     async def stream(self, text: str) -> AsyncIterator[bytes]:
         if not text:
             return
+        key = self._cache_key(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            yield cached
+            return
         try:
             import edge_tts  # type: ignore
         except Exception:
             # Fallback: emit nothing if edge-tts not installed
             return
         communicate = edge_tts.Communicate(text, self.voice)
+        chunks = []
         async for chunk in communicate.stream():
             if chunk["type"] == "audio":
+                chunks.append(chunk["data"])
                 yield chunk["data"]
-
+        if chunks:
+            self._cache[key] = b"".join(chunks)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)